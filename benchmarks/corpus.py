@@ -0,0 +1,208 @@
+"""
+Synthetic Wiktionary-like corpus and dump writer for benchmarks.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import bz2
+import json
+import random
+import zlib
+from typing import IO, Iterable, Iterator, NamedTuple
+from xml.sax.saxutils import escape
+
+LANGUAGES = [
+    ("English", "en"),
+    ("French", "fr"),
+    ("Old English", "ang"),
+    ("Middle English", "enm"),
+    ("Proto-Germanic", "gem-pro"),
+    ("Ancient Greek", "grc"),
+]
+TOPICS = ["Animals", "Colors", "Food and drink", "Music", "Plants", "Weather"]
+POS = ["Noun", "Verb", "Adjective", "Adverb"]
+
+NAMESPACES = {0: "", 1: "Talk:", 2: "User:", 14: "Category:", 118: "Reconstruction:"}
+
+
+class CorpusPage(NamedTuple):
+    title: str
+    ns: int
+    pageid: int
+    revid: int
+    text: str
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(
+        rng.choice("abcdefghijklmnoprstuvwyz") for _ in range(rng.randint(3, 9))
+    )
+
+
+def entry(rng: random.Random, title: str, sections: int = 2, padding: int = 0) -> str:
+    """
+    Build an entry with a mix of the markup the scripts look for: raw
+    topic and langname categories, |head= parameters, {{l}} in alternative
+    forms sections and messy whitespace for the normaliser.
+    """
+    out = []
+    for name, code in rng.sample(LANGUAGES, k=min(sections, len(LANGUAGES))):
+        out.append(f"=={name}==")
+        # Some entries get an image, picked without drawing from `rng` so
+        # that the rest of the corpus doesn't change.
+        if len(out) == 1 and zlib.crc32(title.encode()) % 4 == 0:
+            out.append(f"[[File:{title} illustration.jpg|thumb|{title}]]")
+        if rng.random() < 0.5:
+            out.append("===Alternative forms===")
+            template = "l" if rng.random() < 0.6 else "alt"
+            out.append(f"* {{{{{template}|{code}|{_word(rng)}}}}}")
+            out.append("")
+        out.append("===Etymology===")
+        out.append(f"From {{{{inh|{code}|enm|{_word(rng)}}}}}.")
+        out.append("\t")
+        pos = rng.choice(POS)
+        out.append(f"=== {pos} ===")
+        head = f"|head={title}" if rng.random() < 0.3 else ""
+        out.append(f"{{{{head|{code}|{pos.lower()}{head}}}}}")
+        out.append("")
+        for _ in range(rng.randint(1, 4)):
+            out.append(f"#{' '.join(_word(rng) for _ in range(rng.randint(3, 12)))}")
+        if padding:
+            out.append(" ".join(_word(rng) for _ in range(padding)))
+        out.append("")
+        if rng.random() < 0.4:
+            out.append(f"[[Category:{code}:{rng.choice(TOPICS)}]]")
+        if rng.random() < 0.4:
+            out.append(
+                f"[[Category:{name} {rng.choice(['idioms', 'slang', 'terms'])}]]"
+            )
+        if rng.random() < 0.3:
+            out.append(f"{{{{C|{code}|{rng.choice(TOPICS)}}}}}")
+        out.append("")
+        out.append("----")
+        out.append("")
+    return "\n".join(out[:-3]) + "\n"
+
+
+def generate(count: int, seed: int = 0, padding: int = 0) -> Iterator[CorpusPage]:
+    rng = random.Random(seed)
+    for i in range(count):
+        ns = rng.choice([0, 0, 0, 0, 1, 2, 118])
+        title = NAMESPACES[ns] + f"{_word(rng)}{i}"
+        if ns in (1, 2):
+            text = (
+                f"{{{{Babel|en|fr-2}}}}\n{_word(rng)} {_word(rng)}\n"
+                f"[[{title}/babel|more babel boxes]]\n"
+            )
+        else:
+            text = entry(rng, title.split(":")[-1], rng.randint(1, 3), padding)
+        yield CorpusPage(title, ns, i + 1, 100_000 + i, text)
+
+
+def modules() -> list[CorpusPage]:
+    """
+    The Module: data pages lib.data_utils loads, covering LANGUAGES.
+    """
+    names = {name: code for name, code in LANGUAGES}
+    codes = {code: name for name, code in LANGUAGES}
+    return [
+        CorpusPage(
+            "Module:languages/canonical names.json",
+            828,
+            9_000_001,
+            9_000_001,
+            json.dumps(names),
+        ),
+        CorpusPage(
+            "Module:languages/code to canonical name.json",
+            828,
+            9_000_002,
+            9_000_002,
+            json.dumps(codes),
+        ),
+    ]
+
+
+def _title(page: CorpusPage) -> str:
+    # As the wiki stores it, and so as dumps have it: Wiktionary is
+    # case-sensitive in the main namespace only.
+    if page.ns == 0:
+        return page.title
+    prefix, _, rest = page.title.partition(":")
+    return f"{prefix}:{rest[:1].upper()}{rest[1:]}"
+
+
+def _page_xml(page: CorpusPage) -> str:
+    return (
+        "  <page>\n"
+        f"    <title>{escape(_title(page))}</title>\n"
+        f"    <ns>{page.ns}</ns>\n"
+        f"    <id>{page.pageid}</id>\n"
+        "    <revision>\n"
+        f"      <id>{page.revid}</id>\n"
+        "      <timestamp>2026-01-01T00:00:00Z</timestamp>\n"
+        "      <contributor><username>Example</username><id>1</id></contributor>\n"
+        "      <model>wikitext</model>\n"
+        "      <format>text/x-wiki</format>\n"
+        f'      <text bytes="{len(page.text.encode())}" xml:space="preserve">'
+        f"{escape(page.text)}</text>\n"
+        "    </revision>\n"
+        "  </page>\n"
+    )
+
+
+HEADER = (
+    '<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" '
+    'version="0.11" xml:lang="en">\n'
+    "  <siteinfo>\n    <sitename>Wiktionary</sitename>\n  </siteinfo>\n"
+)
+FOOTER = "</mediawiki>\n"
+
+
+def write_dump(out: IO[bytes], pages: Iterable[CorpusPage]):
+    out.write(HEADER.encode())
+    for page in pages:
+        out.write(_page_xml(page).encode())
+    out.write(FOOTER.encode())
+
+
+def write_multistream(
+    out: IO[bytes], index: IO[bytes], pages: Iterable[CorpusPage], per_stream: int = 100
+):
+    """
+    Write a bz2 multistream dump in the same layout as the WMF ones: the
+    header, then one stream per `per_stream` pages, then the footer, with an
+    index of "offset:page id:title" lines.
+    """
+    offset = out.write(bz2.compress(HEADER.encode()))
+    lines = []
+    batch: list[CorpusPage] = []
+
+    def flush():
+        nonlocal offset
+        data = "".join(_page_xml(page) for page in batch).encode()
+        lines.extend(f"{offset}:{page.pageid}:{_title(page)}\n" for page in batch)
+        offset += out.write(bz2.compress(data))
+        batch.clear()
+
+    for page in pages:
+        batch.append(page)
+        if len(batch) == per_stream:
+            flush()
+    if batch:
+        flush()
+    out.write(bz2.compress(FOOTER.encode()))
+    index.write(bz2.compress("".join(lines).encode()))
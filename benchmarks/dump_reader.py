@@ -0,0 +1,87 @@
+"""
+Benchmark lib.dump: pages/sec and peak RSS while streaming a dump.
+
+    python benchmarks/dump_reader.py path/to/dump.xml.bz2 -n 0 -n 118
+    python benchmarks/dump_reader.py --synthetic 50000
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "saphbot"))
+
+import corpus
+from lib.dump import iter_index, iter_pages, iter_titles
+from lib.metrics import peak_rss_mib
+
+
+def run(label: str, pages) -> None:
+    started = time.perf_counter()
+    count = size = 0
+    for page in pages:
+        count += 1
+        size += len(page.text)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<12} {count:>9} pages {elapsed:>8.2f}s "
+        f"{count / elapsed:>10.0f} pages/s {size / elapsed / 2**20:>8.1f} MiB/s "
+        f"peak RSS {peak_rss_mib():.0f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?", help="Dump to read (.xml, .bz2 or .gz)")
+    parser.add_argument("--index", help="Multistream index, for the seek benchmark")
+    parser.add_argument(
+        "-n", "--namespace", type=int, action="append", help="Namespace to keep"
+    )
+    parser.add_argument(
+        "--synthetic", type=int, metavar="N", help="Generate a dump of N pages"
+    )
+    parser.add_argument(
+        "--sample", type=int, default=1000, help="Titles to look up via the index"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path, index = args.path, args.index
+        if args.synthetic:
+            path = f"{tmp}/synthetic-multistream.xml.bz2"
+            index = f"{tmp}/synthetic-multistream-index.txt.bz2"
+            with open(path, "wb") as out, open(index, "wb") as idx:
+                corpus.write_multistream(out, idx, corpus.generate(args.synthetic))
+        if path is None:
+            parser.error("give a dump path or --synthetic N")
+
+        namespaces = set(args.namespace) if args.namespace else None
+        print(f"before reading: peak RSS {peak_rss_mib():.0f} MiB")
+        run("sequential", iter_pages(path, namespaces))
+
+        if index is not None:
+            titles = [title for _, _, title in iter_index(index)]
+            sample = random.Random(0).sample(titles, min(args.sample, len(titles)))
+            run("indexed", iter_titles(path, index, sample, namespaces))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Run SaphBot scripts end to end against the fake API in fakewiki.py.
+
+Each script gets a fresh wiki seeded with the synthetic corpus, its own
+PYWIKIBOT_DIR and a scratch working directory, and runs as a subprocess
+exactly as it would from the command line. Figures come from the run's
+--metrics-json summary.
+
+    python benchmarks/end_to_end.py
+    python benchmarks/end_to_end.py replace_l_alt --pages 20000 -- --normalise
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import corpus
+import fakewiki
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = [
+    "topic_categories_raw",
+    "langname_categories_raw",
+    "redundant_head_parameter",
+    "replace_l_alt",
+    "add_missing_reconstructed",
+    "disable_babel_cat",
+    "ai_images",
+]
+
+FAMILY = """\
+from pywikibot import family
+
+
+class Family(family.SingleSiteFamily):
+    name = "{name}"
+    code = "{code}"
+    domain = "127.0.0.1:{port}"
+
+    def protocol(self, code):
+        return "http"
+
+    def scriptpath(self, code):
+        return "/w"
+"""
+
+USER_CONFIG = """\
+family = "fakewiki"
+mylang = "en"
+usernames["fakewiki"]["en"] = "{username}"
+register_families_folder({families!r})
+put_throttle = 0
+minthrottle = 0
+maxthrottle = 0
+"""
+
+
+def setup(tmp: Path, port: int, pages: list[corpus.CorpusPage]) -> dict[str, str]:
+    """
+    Lay out a PYWIKIBOT_DIR pointing at the fake wiki and a working
+    directory the scripts can treat as the repository root, returning the
+    environment to run them in.
+    """
+    families = tmp / "families"
+    families.mkdir()
+    (families / "fakewiki_family.py").write_text(
+        FAMILY.format(name="fakewiki", code="en", port=port)
+    )
+    # Shadows pywikibot's own commons family, for ai_images.
+    (families / "commons_family.py").write_text(
+        FAMILY.format(name="commons", code="commons", port=port)
+    )
+    (tmp / "user-config.py").write_text(
+        USER_CONFIG.format(username=fakewiki.USERNAME, families=str(families))
+    )
+    # Scripts read lists relative to the repository root, and some keep
+    # caches in the working directory, which must not be the real one.
+    (tmp / "saphbot").symlink_to(ROOT / "saphbot")
+    # replace_l_alt reads its candidates from a local dump.
+    (tmp / "dumps").mkdir()
+    with open(tmp / "dumps" / "latest.xml", "wb") as out:
+        corpus.write_dump(out, pages)
+    return {**os.environ, "PYWIKIBOT_DIR": str(tmp), "PYTHONUNBUFFERED": "1"}
+
+
+def run(script: str, count: int, extra: list[str], verbose: bool) -> dict:
+    pages = list(corpus.generate(count))
+    wiki = fakewiki.Wiki(pages)
+    server = fakewiki.serve(wiki)
+    port = server.server_address[1]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = setup(Path(tmp), port, pages)
+            report = Path(tmp) / "metrics.json"
+            command = [
+                sys.executable,
+                "saphbot",
+                script,
+                "--metrics-json",
+                str(report),
+                "--progress-interval",
+                "0",
+                "--edit-rate",
+                "10000",
+                *extra,
+            ]
+            result = subprocess.run(
+                command,
+                cwd=tmp,
+                env=env,
+                stdout=None if verbose else subprocess.DEVNULL,
+                stderr=None if verbose else subprocess.PIPE,
+                text=True,
+            )
+            if result.returncode != 0 or not report.exists():
+                tail = "" if verbose else result.stderr[-2000:]
+                raise RuntimeError(f"{script} exited with {result.returncode}\n{tail}")
+            metrics = json.loads(report.read_text())
+    finally:
+        server.shutdown()
+    metrics["server"] = {"requests": dict(wiki.requests), "edits": wiki.edits}
+    return metrics
+
+
+def row(script: str, metrics: dict) -> str:
+    counters = metrics["counters"]
+    pages = counters.get("started", 0)
+    elapsed = metrics["elapsed"]
+    page = metrics["stages"].get("page", {})
+    api = sum(metrics["server"]["requests"].values())
+    return (
+        f"{script:<28} {pages:>7} {pages / elapsed:>9.1f} "
+        f"{page.get('p50', 0) * 1000:>8.1f} {page.get('p99', 0) * 1000:>8.1f} "
+        f"{api / max(pages, 1):>9.2f} {counters.get('saved', 0):>7} "
+        f"{metrics['peak_rss_mib']:>8.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS, help="Scripts to run")
+    parser.add_argument("--pages", type=int, default=2000, help="Synthetic pages")
+    parser.add_argument("--json", metavar="PATH", help="Write all results here")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Show the scripts' output"
+    )
+    # Anything after "--" goes to saphbot itself.
+    argv = sys.argv[1:]
+    extra = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, extra = argv[:split], argv[split + 1 :]
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'script':<28} {'pages':>7} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'api/page':>9} {'saved':>7} {'RSS MiB':>8}"
+    )
+    results = {}
+    for script in args.scripts:
+        results[script] = run(script, args.pages, extra, args.verbose)
+        print(row(script, results[script]), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,681 @@
+"""
+A local stand-in for the MediaWiki action API, serving a synthetic corpus.
+
+It implements just enough of api.php for pywikibot to log in, enumerate
+categories and template transclusions, preload pages, look up user
+contributions and save edits. Every category that isn't a real page holds
+all content pages, spread over a few subcategories so that recursion is
+exercised too.
+
+    python benchmarks/fakewiki.py --pages 5000 --port 8080
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import corpus
+
+USERNAME = "BenchBot"
+TEMPLATE = re.compile(r"\{\{([^|{}\n]+)")
+SUBCATS = 4
+# Ids of pages that only exist virtually (categories) start here.
+VIRTUAL_IDS = 10_000_000
+RIGHTS = [
+    "read",
+    "edit",
+    "createpage",
+    "bot",
+    "apihighlimits",
+    "writeapi",
+    "noratelimit",
+]
+
+SUBJECT_NAMESPACES = {
+    0: "",
+    2: "User",
+    4: "Wiktionary",
+    6: "File",
+    8: "MediaWiki",
+    10: "Template",
+    12: "Help",
+    14: "Category",
+    100: "Appendix",
+    118: "Reconstruction",
+    828: "Module",
+}
+NAMESPACES = {-2: "Media", -1: "Special"}
+for ns, name in SUBJECT_NAMESPACES.items():
+    NAMESPACES[ns] = name
+    NAMESPACES[ns + 1] = f"{name} talk" if name else "Talk"
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class ApiError(Exception):
+    def __init__(self, code: str, info: str):
+        super().__init__(info)
+        self.code = code
+        self.info = info
+
+
+class Page:
+    __slots__ = ("pageid", "ns", "title", "revid", "timestamp", "text")
+
+    def __init__(self, pageid: int, ns: int, title: str, revid: int, text: str):
+        self.pageid = pageid
+        self.ns = ns
+        self.title = title
+        self.revid = revid
+        self.timestamp = "2026-01-01T00:00:00Z"
+        self.text = text
+
+
+class Wiki:
+    """
+    The pages behind the fake API, plus a count of requests by module.
+    """
+
+    def __init__(self, pages: Iterable[corpus.CorpusPage]):
+        self.pages: dict[str, Page] = {}
+        self.ids: dict[int, Page] = {}
+        for p in [*pages, *corpus.modules()]:
+            page = Page(p.pageid, p.ns, self.canonical(p.title), p.revid, p.text)
+            self.pages[page.title] = page
+            self.ids[page.pageid] = page
+        self.content = [p for p in self.pages.values() if p.ns in (0, 100, 118)]
+        self.next_revid = max((p.revid for p in self.pages.values()), default=0) + 1
+        self.lock = threading.Lock()
+        self.requests: Counter[str] = Counter()
+        self.edits = 0
+
+    # Titles and categories.
+
+    @staticmethod
+    def canonical(title: str) -> str:
+        # Wiktionary is case-sensitive in the main namespace only.
+        prefix, sep, rest = title.partition(":")
+        if not sep or prefix not in NAMESPACES.values():
+            return title
+        return f"{prefix}:{rest[:1].upper()}{rest[1:]}"
+
+    def namespace_of(self, title: str) -> int:
+        prefix, sep, _ = title.partition(":")
+        if sep:
+            for ns, name in NAMESPACES.items():
+                if name == prefix:
+                    return ns
+        return 0
+
+    def category(self, title: str) -> tuple[list[str], list[Page]]:
+        """
+        Subcategories and pages of a category.
+        """
+        if title == "Category:English lemmas":
+            return [], self.content
+        if title.endswith(")") and " (part " in title:
+            part = int(title.rsplit(" (part ", 1)[1][:-1])
+            return [], self.content[part::SUBCATS]
+        return [f"{title} (part {i})" for i in range(SUBCATS)], []
+
+    def file_categories(self, title: str) -> list[str]:
+        # A third of all files are AI-generated.
+        if zlib.crc32(title.encode()) % 3 == 0:
+            return ["Category:AI-generated images of plants"]
+        return ["Category:Photographs"]
+
+    def virtual(self, title: str) -> Optional[dict[str, Any]]:
+        # Categories and files exist without pages behind them; files
+        # stand in for Commons.
+        ns = self.namespace_of(title)
+        if ns not in (6, 14):
+            return None
+        return {
+            "pageid": VIRTUAL_IDS + abs(hash(title)) % VIRTUAL_IDS,
+            "ns": ns,
+            "title": title,
+        }
+
+    def embedded_in(self, title: str) -> list[Page]:
+        name = title.partition(":")[2]
+        needles = ("{{" + name, "{{" + name[:1].lower() + name[1:])
+        return [
+            p
+            for p in self.pages.values()
+            if any(needle in p.text for needle in needles)
+        ]
+
+    # Rendering.
+
+    def render(self, page: Page, params: dict[str, str], fv2: bool) -> dict:
+        props = set(params.get("prop", "").split("|"))
+        data: dict[str, Any] = {"pageid": page.pageid, "ns": page.ns}
+        data["title"] = page.title
+        if "info" in props:
+            data.update(
+                contentmodel="wikitext",
+                pagelanguage="en",
+                touched=page.timestamp,
+                lastrevid=page.revid,
+                length=len(page.text.encode()),
+            )
+        if "revisions" in props:
+            rvprop = set(params.get("rvprop", "ids|timestamp").split("|"))
+            revision: dict[str, Any] = {
+                "revid": page.revid,
+                "parentid": page.revid - 1,
+                "user": "Example",
+                "timestamp": page.timestamp,
+                "comment": "",
+                "size": len(page.text.encode()),
+            }
+            if "content" in rvprop:
+                main = {"contentmodel": "wikitext", "contentformat": "text/x-wiki"}
+                main["content" if fv2 else "*"] = page.text
+                revision["slots"] = {"main": main}
+            data["revisions"] = [revision]
+        if "categoryinfo" in props and page.ns == 14:
+            data["categoryinfo"] = {"size": 0, "pages": 0, "files": 0, "subcats": 0}
+        return data
+
+    def render_title(self, title: str, params: dict[str, str], fv2: bool) -> dict:
+        page = self.pages.get(title)
+        if page is not None:
+            return self.render(page, params, fv2)
+        virtual = self.virtual(title)
+        if virtual is not None:
+            if "categories" in params.get("prop", "") and virtual["ns"] == 6:
+                virtual["categories"] = [
+                    {"ns": 14, "title": category}
+                    for category in self.file_categories(title)
+                ]
+            if "categoryinfo" in params.get("prop", "") and virtual["ns"] == 14:
+                subcats, pages = self.category(title)
+                virtual["categoryinfo"] = {
+                    "size": len(subcats) + len(pages),
+                    "pages": len(pages),
+                    "files": 0,
+                    "subcats": len(subcats),
+                }
+            return virtual
+        missing: dict[str, Any] = {"ns": self.namespace_of(title), "title": title}
+        missing["missing"] = True if fv2 else ""
+        return missing
+
+    # Modules.
+
+    def siteinfo(self, params: dict[str, str]) -> dict:
+        props = params.get("siprop", "general").split("|")
+        info: dict[str, Any] = {}
+        for prop in props:
+            if prop == "general":
+                info["general"] = {
+                    "mainpage": "Wiktionary:Main Page",
+                    "base": "http://localhost/wiki/Wiktionary:Main_Page",
+                    "sitename": "Wiktionary",
+                    "generator": "MediaWiki 1.45.0",
+                    "phpversion": "8.3.0",
+                    "dbtype": "mysql",
+                    "lang": "en",
+                    "case": "case-sensitive",
+                    "rights": "",
+                    "wikiid": "fakewiki",
+                    "server": "http://localhost",
+                    "servername": "localhost",
+                    "articlepath": "/wiki/$1",
+                    "scriptpath": "/w",
+                    "script": "/w/index.php",
+                    "timezone": "UTC",
+                    "timeoffset": 0,
+                    "time": now(),
+                    "maxarticlesize": 2097152,
+                    "legaltitlechars": " %!\"$&'()*,\\-.\\/0-9:;=?@A-Z\\\\^_`a-z~\\x80-\\xFF+",
+                    "invalidusernamechars": "@:>=",
+                    "readonly": False,
+                    "writeapi": True,
+                    "maxuploadsize": 0,
+                    "thumblimits": {"0": 120, "1": 150},
+                    "imagelimits": {"0": {"width": 320, "height": 240}},
+                    "magiclinks": {"ISBN": False, "PMID": False, "RFC": False},
+                }
+            elif prop == "namespaces":
+                info["namespaces"] = {
+                    str(ns): {
+                        "id": ns,
+                        "case": "case-sensitive" if ns == 0 else "first-letter",
+                        "name": name,
+                        "canonical": name,
+                        "content": ns in (0, 100, 118),
+                        "nonincludable": False,
+                        "subpages": ns not in (0, 14),
+                    }
+                    for ns, name in NAMESPACES.items()
+                }
+            else:
+                info[prop] = []
+        return info
+
+    def query(self, params: dict[str, str], fv2: bool) -> dict:
+        result: dict[str, Any] = {}
+        query: dict[str, Any] = {}
+        cont: dict[str, str] = {}
+
+        for meta in filter(None, params.get("meta", "").split("|")):
+            if meta == "siteinfo":
+                query.update(self.siteinfo(params))
+            elif meta == "userinfo":
+                query["userinfo"] = {
+                    "id": 1,
+                    "name": USERNAME,
+                    "groups": ["*", "user", "bot"],
+                    "rights": RIGHTS,
+                    "messages": False,
+                }
+            elif meta == "tokens":
+                query["tokens"] = {
+                    f"{kind}token": "0123456789abcdef+\\"
+                    for kind in params.get("type", "csrf").split("|")
+                }
+            else:
+                raise ApiError("badvalue", f"unsupported meta {meta}")
+
+        for module in filter(None, params.get("list", "").split("|")):
+            prefix = LIST_PREFIXES.get(module)
+            if prefix is None:
+                raise ApiError("badvalue", f"unsupported list {module}")
+            items, more = self.listing(module, prefix, params)
+            query[module] = [self.entry(item) for item in items]
+            if more is not None:
+                cont[f"{prefix}continue"] = more
+
+        pages: list[dict] = []
+        generator = params.get("generator")
+        if generator is not None:
+            prefix = LIST_PREFIXES.get(generator)
+            if prefix is None:
+                raise ApiError("badvalue", f"unsupported generator {generator}")
+            items, more = self.listing(generator, "g" + prefix, params)
+            pages = [self.render_item(item, params, fv2) for item in items]
+            if more is not None:
+                cont[f"g{prefix}continue"] = more
+        elif "titles" in params:
+            pages = [
+                self.render_title(title, params, fv2)
+                for title in params["titles"].split("|")
+            ]
+        elif "pageids" in params:
+            pages = [
+                self.render(self.ids[int(i)], params, fv2)
+                for i in params["pageids"].split("|")
+                if int(i) in self.ids
+            ]
+        if pages:
+            if fv2:
+                query["pages"] = pages
+            else:
+                query["pages"] = {
+                    str(p.get("pageid", -1 - i)): p for i, p in enumerate(pages)
+                }
+
+        if query:
+            result["query"] = query
+        if cont:
+            result["continue"] = {**cont, "continue": "-||"}
+        else:
+            result["batchcomplete"] = True if fv2 else ""
+        return result
+
+    def render_item(self, item: Any, params: dict[str, str], fv2: bool) -> dict:
+        if isinstance(item, Page):
+            return self.render(item, params, fv2)
+        return self.render_title(item, params, fv2)
+
+    def entry(self, item: Any) -> dict:
+        if isinstance(item, Page):
+            return {"pageid": item.pageid, "ns": item.ns, "title": item.title}
+        if isinstance(item, dict):
+            return item
+        return self.virtual(item) or {"ns": 0, "title": item}
+
+    def listing(
+        self, module: str, prefix: str, params: dict[str, str]
+    ) -> tuple[list[Any], Optional[str]]:
+        """
+        The items of a list module, paged by offset.
+        """
+        handler: Callable[[str, dict[str, str]], list[Any]] = getattr(
+            self, f"list_{module}"
+        )
+        items = handler(prefix, params)
+        namespaces = params.get(f"{prefix}namespace")
+        if namespaces is not None:
+            wanted = {int(ns) for ns in namespaces.split("|")}
+            items = [item for item in items if self.entry(item).get("ns", 0) in wanted]
+        limit = params.get(f"{prefix}limit", "10")
+        size = 5000 if limit == "max" else int(limit)
+        start = int(params.get(f"{prefix}continue", 0))
+        more = start + size if start + size < len(items) else None
+        return items[start : start + size], None if more is None else str(more)
+
+    def list_categorymembers(self, prefix: str, params: dict[str, str]) -> list[Any]:
+        subcats, pages = self.category(params[f"{prefix}title"])
+        types = params.get(f"{prefix}type", "page|subcat|file").split("|")
+        items: list[Any] = []
+        if "subcat" in types:
+            items.extend(subcats)
+        if "page" in types:
+            items.extend(pages)
+        return items
+
+    def list_embeddedin(self, prefix: str, params: dict[str, str]) -> list[Any]:
+        return self.embedded_in(params[f"{prefix}title"])
+
+    def list_allpages(self, prefix: str, params: dict[str, str]) -> list[Any]:
+        ns = int(params.get(f"{prefix}namespace", 0))
+        return [p for p in self.pages.values() if p.ns == ns]
+
+    def list_recentchanges(self, prefix: str, params: dict[str, str]) -> list[Any]:
+        # Nothing is ever recategorised here, and edits aren't logged.
+        return []
+
+    def list_templates(self, prefix: str, params: dict[str, str]) -> list[Any]:
+        # Only ever used as a generator over the pages given by titles=.
+        names: dict[str, None] = {}
+        for title in params.get("titles", "").split("|"):
+            page = self.pages.get(title)
+            if page is None:
+                continue
+            for name in TEMPLATE.findall(page.text):
+                name = name.strip()
+                names["Template:" + name[:1].upper() + name[1:]] = None
+        return list(names)
+
+    def list_usercontribs(self, prefix: str, params: dict[str, str]) -> list[Any]:
+        contribs = []
+        for user in params.get(f"{prefix}user", "").split("|"):
+            page = self.pages.get(f"User:{user}")
+            if page is None:
+                continue
+            # Half the users last edited long ago.
+            timestamp = (
+                "2019-06-01T00:00:00Z" if page.pageid % 2 else "2026-01-01T00:00:00Z"
+            )
+            # Newest first: ucstart is the newer bound, ucend the older.
+            if (
+                not params.get(f"{prefix}end", "")
+                <= timestamp
+                <= params.get(f"{prefix}start", "9")
+            ):
+                continue
+            contribs.append(
+                {
+                    "userid": page.pageid,
+                    "user": user,
+                    "pageid": page.pageid,
+                    "revid": page.revid,
+                    "parentid": page.revid - 1,
+                    "ns": 2,
+                    "title": page.title,
+                    "timestamp": timestamp,
+                    "comment": "",
+                    "size": len(page.text),
+                }
+            )
+        return contribs
+
+    def edit(self, params: dict[str, str]) -> dict:
+        if "token" not in params:
+            raise ApiError("missingparam", "The token parameter must be set.")
+        title = params["title"]
+        with self.lock:
+            page = self.pages.get(title)
+            if page is None:
+                raise ApiError("missingtitle", "The page doesn't exist.")
+            base = params.get("baserevid")
+            if base is not None and int(base) != page.revid:
+                raise ApiError("editconflict", "Edit conflict detected.")
+            old = page.revid
+            if params.get("text", page.text) == page.text:
+                return {"edit": {"result": "Success", "title": title, "nochange": ""}}
+            page.text = params["text"]
+            page.revid = self.next_revid
+            page.timestamp = now()
+            self.next_revid += 1
+            self.edits += 1
+        return {
+            "edit": {
+                "result": "Success",
+                "pageid": page.pageid,
+                "title": title,
+                "contentmodel": "wikitext",
+                "oldrevid": old,
+                "newrevid": page.revid,
+                "newtimestamp": page.timestamp,
+            }
+        }
+
+    def handle(self, params: dict[str, str]) -> dict:
+        action = params.get("action", "")
+        fv2 = params.get("formatversion") == "2"
+        modules = [action] + [
+            f"{key}={value}"
+            for key in ("meta", "list", "prop", "generator")
+            for value in filter(None, params.get(key, "").split("|"))
+        ]
+        with self.lock:
+            self.requests.update(modules[1:] or modules)
+        try:
+            if action == "query":
+                return self.query(params, fv2)
+            if action == "edit":
+                return self.edit(params)
+            if action == "login":
+                return {"login": {"result": "Success", "lgusername": USERNAME}}
+            if action == "paraminfo":
+                modules = params.get("modules", "").split("|")
+                return {"paraminfo": {"modules": [paraminfo(m) for m in modules]}}
+            raise ApiError("badvalue", f"unsupported action {action}")
+        except ApiError as e:
+            return {"error": {"code": e.code, "info": e.info}, "servedby": "fakewiki"}
+
+
+# The query submodules the fake supports, with their parameter prefixes.
+QUERY_MODULES = {
+    "list": {
+        "allpages": "ap",
+        "categorymembers": "cm",
+        "embeddedin": "ei",
+        "recentchanges": "rc",
+        "usercontribs": "uc",
+    },
+    "prop": {
+        "categories": "cl",
+        "categoryinfo": "ci",
+        "info": "in",
+        "langlinks": "ll",
+        "pageprops": "pp",
+        "revisions": "rv",
+        "templates": "tl",
+    },
+    "meta": {"siteinfo": "si", "tokens": "", "userinfo": "ui"},
+}
+LIST_PREFIXES = {**QUERY_MODULES["list"], "templates": "tl"}
+ACTIONS = ["edit", "login", "paraminfo", "query"]
+
+
+def _module(name: str, path: str, prefix: str = "", **extra) -> dict[str, Any]:
+    return {
+        "name": name,
+        "classname": "Api" + name.title(),
+        "path": path,
+        "group": "action" if "+" not in path else path.split("+")[0],
+        "prefix": prefix,
+        "source": "MediaWiki",
+        "parameters": [],
+        **extra,
+    }
+
+
+def paraminfo(path: str) -> dict[str, Any]:
+    """
+    The paraminfo for one module path, or a "missing" entry.
+    """
+    if path == "main":
+        module = _module("main", "main")
+        module["parameters"] = [
+            {
+                "name": "action",
+                "type": ACTIONS,
+                "submodules": {action: action for action in ACTIONS},
+            }
+        ]
+        return module
+    if path in ACTIONS and path != "query":
+        extra = {"mustbeposted": ""} if path in ("edit", "login") else {}
+        return _module(path, path, **extra)
+    if path == "query":
+        module = _module("query", "query")
+        for group, modules in QUERY_MODULES.items():
+            module["parameters"].append(
+                {
+                    "name": group,
+                    "type": sorted(modules),
+                    "multi": "",
+                    "limit": 50,
+                    "submodules": {name: f"query+{name}" for name in modules},
+                }
+            )
+        generators = sorted([*QUERY_MODULES["list"], "revisions", "templates"])
+        module["parameters"].append(
+            {
+                "name": "generator",
+                "type": generators,
+                "submodules": {name: f"query+{name}" for name in generators},
+            }
+        )
+        return module
+
+    name = path.partition("+")[2]
+    for modules in QUERY_MODULES.values():
+        if name in modules:
+            break
+    else:
+        return {"name": path, "missing": ""}
+    module = _module(name, path, modules[name])
+    parameters = module["parameters"]
+    if name in LIST_PREFIXES:
+        module["generator"] = ""
+        parameters.append(
+            {"name": "limit", "type": "limit", "max": 500, "highmax": 5000}
+        )
+        parameters.append(
+            {"name": "namespace", "type": sorted(NAMESPACES), "multi": ""}
+        )
+        if name in ("recentchanges", "usercontribs"):
+            show = ["autopatrolled", "minor", "new", "patrolled", "top"]
+            if name == "recentchanges":
+                show += ["anon", "bot", "redirect", "unpatrolled"]
+            parameters.append(
+                {
+                    "name": "show",
+                    "type": [*show, *(f"!{flag}" for flag in show)],
+                    "multi": "",
+                }
+            )
+    elif name == "info":
+        parameters.append({"name": "prop", "type": [], "limit": 50, "highlimit": 500})
+    elif name == "tokens":
+        parameters.append({"name": "type", "type": ["csrf", "login"], "multi": ""})
+    return module
+
+
+def serve(wiki: Wiki, port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start serving `wiki` on localhost in a background thread. Port 0 picks
+    a free port; read it back from server.server_address.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; without this,
+            # Nagle and delayed ACKs add ~40ms to every request.
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def respond(self, params: dict[str, str]):
+            if urlsplit(self.path).path == "/stats":
+                body = json.dumps(
+                    {"requests": dict(wiki.requests), "edits": wiki.edits}
+                ).encode()
+            else:
+                body = json.dumps(wiki.handle(params)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.respond(dict(parse_qsl(urlsplit(self.path).query)))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode()
+            params = dict(parse_qsl(urlsplit(self.path).query))
+            params.update(parse_qsl(body, keep_blank_values=True))
+            self.respond(params)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5000, help="Synthetic pages")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = serve(Wiki(corpus.generate(args.pages)), args.port)
+    print(f"serving {args.pages} pages on http://127.0.0.1:{args.port}/w/api.php")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
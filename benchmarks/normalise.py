@@ -0,0 +1,121 @@
+"""
+Check lib.misc.normalise_text against the original six-pass normaliser and
+time both on large pages.
+
+    python benchmarks/normalise.py
+    python benchmarks/normalise.py --fuzz 1000000 a.wikitext water.wikitext
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "saphbot"))
+
+import corpus
+from lib.misc import normalise_text
+
+# Fragments that hit the edge cases of the original patterns: list markers
+# at the very start, unbalanced and back-to-back headings, and runs of
+# spaces and blank lines.
+FRAGMENTS = ["=", "==", "\n", "\n==", " ", " ==", "\t", "a", ";", "*", "#", ":"]
+
+
+def reference(text: str) -> str:
+    """
+    The normaliser as it was before it was precompiled.
+    """
+    text = re.sub(r"\t", " ", text)
+    text = re.sub(r"^([;:#*]+)(?=[^;:#*\s])", r"\1 ", text)
+    text = re.sub(r"(?:\n *)*\n==", "\n\n==", text)
+    text = re.sub(r"^((?!=)[^\n]*(?:\n(?!=)[^\n]*?)*?)\n+==", r"\1\n==", text)
+    text = re.sub(r"\n +| +\n", "\n", text)
+    text = re.sub(r"(^|\n)(=+) *([^\n]+?) *\2(\n|$)", r"\1\2\3\2\4", text)
+    return text
+
+
+def fuzz(count: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 40)))
+
+
+def large_page(sections: int, seed: int = 0) -> str:
+    """
+    Something the size of [[a]] or [[water]]: many language sections, each
+    with long definitions and the usual stray whitespace.
+    """
+    rng = random.Random(seed)
+    return "".join(
+        corpus.entry(rng, "water", sections=6, padding=200)
+        for _ in range(sections // 6)
+    )
+
+
+def check(texts) -> int:
+    checked = 0
+    for text in texts:
+        expected = reference(text)
+        actual = normalise_text(text)
+        if actual != expected:
+            sys.exit(
+                f"mismatch on {text!r}:\n  expected {expected!r}\n  got      {actual!r}"
+            )
+        checked += 1
+    return checked
+
+
+def bench(label: str, text: str) -> None:
+    number = 20
+    old = min(timeit.repeat(lambda: reference(text), number=number, repeat=3))
+    new = min(timeit.repeat(lambda: normalise_text(text), number=number, repeat=3))
+    print(
+        f"{label:<24} {len(text) / 1024:>8.0f} KiB "
+        f"old {old / number * 1e3:>8.2f} ms new {new / number * 1e3:>8.2f} ms "
+        f"({old / new:.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pages", nargs="*", help="Wikitext files to check and time")
+    parser.add_argument("--fuzz", type=int, default=200_000, help="Random strings")
+    parser.add_argument("--corpus", type=int, default=5_000, help="Synthetic pages")
+    args = parser.parse_args()
+
+    pages = {path: Path(path).read_text(encoding="utf-8") for path in args.pages}
+    pages["synthetic (120 sections)"] = large_page(120)
+    pages["synthetic (600 sections)"] = large_page(600)
+    # No heading after a long lead: the worst case for the old fourth pass.
+    pages["no headings"] = "\n".join(f"* line {i}" for i in range(20_000))
+
+    checked = check(page.text for page in corpus.generate(args.corpus))
+    checked += check(fuzz(args.fuzz))
+    checked += check(pages.values())
+    print(f"{checked} texts normalised identically")
+
+    for label, text in pages.items():
+        bench(label, text)
+
+
+if __name__ == "__main__":
+    main()
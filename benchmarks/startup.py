@@ -0,0 +1,119 @@
+"""
+Time each script from launch to its first treated page against the fake
+wiki from fakewiki.py, along with `saphbot --list`.
+
+"ready" is when the bot was constructed, i.e. once imports and argument
+handling were done; "first page" is when treat() first returned. Every
+launch starts without .saphbot_cache, as a first run would.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py disable_babel_cat --runs 5
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import corpus
+import end_to_end
+import fakewiki
+
+
+def launch(tmp: Path, env: dict[str, str], script: str) -> tuple[float, float]:
+    """
+    Run one script as a dry run and return seconds from launch until it
+    was ready and until its first treated page.
+    """
+    report = tmp / "metrics.json"
+    report.unlink(missing_ok=True)
+    shutil.rmtree(tmp / ".saphbot_cache", ignore_errors=True)
+    launched = time.time()
+    subprocess.run(
+        [
+            sys.executable,
+            "saphbot",
+            script,
+            "--dry-run",
+            "--progress-interval",
+            "0",
+            "--metrics-json",
+            str(report),
+        ],
+        cwd=tmp,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    metrics = json.loads(report.read_text())
+    ready = metrics["started_at"] - launched
+    if metrics["first_treat"] is None:
+        return ready, float("nan")
+    return ready, ready + metrics["first_treat"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "scripts", nargs="*", default=end_to_end.SCRIPTS, help="Scripts to run"
+    )
+    parser.add_argument("--pages", type=int, default=500, help="Synthetic pages")
+    parser.add_argument("--runs", type=int, default=3, help="Launches per script")
+    args = parser.parse_args()
+
+    pages = list(corpus.generate(args.pages))
+    wiki = fakewiki.Wiki(pages)
+    server = fakewiki.serve(wiki)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = end_to_end.setup(Path(tmp), server.server_address[1], pages)
+
+            listed = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                subprocess.run(
+                    [sys.executable, "saphbot", "--list"],
+                    cwd=tmp,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+                listed.append(time.perf_counter() - started)
+            print(f"saphbot --list: {statistics.median(listed) * 1000:.0f} ms")
+
+            print(f"{'script':<28} {'ready ms':>9} {'first page ms':>14}")
+            for script in args.scripts:
+                runs = [launch(Path(tmp), env, script) for _ in range(args.runs)]
+                ready = statistics.median(run[0] for run in runs)
+                first = statistics.median(run[1] for run in runs)
+                print(
+                    f"{script:<28} {ready * 1000:>9.0f} {first * 1000:>14.0f}",
+                    flush=True,
+                )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
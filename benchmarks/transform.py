@@ -0,0 +1,118 @@
+"""
+Time scripts' transform() over the synthetic corpus with
+core.transform_pages, in this process and across worker processes.
+
+Scripts need a configured site, if only to build pages, so they are
+imported under a fake wiki from fakewiki.py; the timed part never
+touches it.
+
+    python benchmarks/transform.py
+    python benchmarks/transform.py replace_l_alt --pages 50000 --processes 8
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import importlib
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import corpus
+import end_to_end
+import fakewiki
+
+SCRIPTS = [
+    "topic_categories_raw",
+    "langname_categories_raw",
+    "redundant_head_parameter",
+    "replace_l_alt",
+    "add_missing_reconstructed",
+]
+
+
+def measure(args: argparse.Namespace):
+    """
+    The timing itself, run from the scratch directory set up by main().
+    """
+    sys.path.insert(0, "saphbot")
+    from core import SaphBot, transform_pages
+
+    pages = [(page.title, page.text) for page in corpus.generate(args.pages)]
+    print(
+        f"{'script':<28} {'changed':>8} {'pages/s':>9} "
+        f"{f'x{args.processes} procs':>11} {'pages/s':>9}"
+    )
+    for script in args.scripts:
+        importlib.import_module(f"scripts.{script}")
+        bot = SaphBot.get_entry()
+
+        started = time.perf_counter()
+        changed = list(transform_pages(bot, pages))
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pooled = list(transform_pages(bot, pages, processes=args.processes))
+        multi = time.perf_counter() - started
+
+        if pooled != changed:
+            raise AssertionError(f"{script}: worker processes disagree")
+        print(
+            f"{script:<28} {len(changed):>8} {len(pages) / single:>9.0f} "
+            f"{'':>11} {len(pages) / multi:>9.0f}",
+            flush=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS, help="Scripts to run")
+    parser.add_argument("--pages", type=int, default=20000, help="Synthetic pages")
+    parser.add_argument(
+        "--processes", type=int, default=4, help="Worker processes to compare"
+    )
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args)
+        return
+
+    pages = list(corpus.generate(args.pages))
+    wiki = fakewiki.Wiki(pages)
+    server = fakewiki.serve(wiki)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = end_to_end.setup(Path(tmp), server.server_address[1], pages)
+            subprocess.run(
+                [
+                    sys.executable,
+                    str(Path(__file__).resolve()),
+                    "--measure",
+                    *sys.argv[1:],
+                ],
+                cwd=tmp,
+                env=env,
+                check=True,
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
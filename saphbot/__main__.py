@@ -25,14 +25,33 @@ import signal
 import sys
 
 from core import SaphBot, SaphBotOptions
+from lib.profiling import SamplingProfiler
+from lib.registry import scripts
 
 signal.signal(signal.SIGINT, lambda *_: sys.exit(130))
 logger = logging.getLogger("saphbot")
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive number, got {value}")
+    return number
+
+
 def get_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(prog="saphbot")
-    parser.add_argument("module", help="The module to run")
+    parser.add_argument("module", nargs="?", help="The module to run")
+    parser.add_argument(
+        "--list", action="store_true", help="List the available bots and exit"
+    )
     parser.add_argument("--dry-run", action="store_true", help="Run without saving")
     parser.add_argument(
         "-r",
@@ -49,7 +68,94 @@ def get_arguments() -> argparse.Namespace:
         action="store_true",
         help="Run normalisation per [[WT:NORM]] before saving",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=None,
+        help="Number of threads treating pages (default: chosen by Python)",
+    )
+    parser.add_argument(
+        "--inflight",
+        type=positive_int,
+        default=64,
+        help="Maximum number of pages between fetch and save at once",
+    )
+    parser.add_argument(
+        "--save-workers",
+        type=positive_int,
+        default=4,
+        help="Number of threads saving pages",
+    )
+    parser.add_argument(
+        "--edit-rate",
+        type=positive_float,
+        default=None,
+        help="Maximum edits per second (default: 1/put_throttle from user-config)",
+    )
+    parser.add_argument(
+        "--from-dump",
+        metavar="PATH",
+        default=None,
+        help="Treat pages from a pages-articles XML dump instead of the wiki",
+    )
+    parser.add_argument(
+        "--dump-index",
+        metavar="PATH",
+        default=None,
+        help="Index of a multistream --from-dump (default: guessed from its name)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=positive_int,
+        default=None,
+        help="Run treat() in this many worker processes",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=60.0,
+        metavar="SECONDS",
+        help="Seconds between progress lines, 0 to disable (default: 60)",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        default=None,
+        help="Write a JSON summary of the run's metrics to PATH at exit",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=positive_int,
+        default=None,
+        metavar="PORT",
+        help="Serve Prometheus-style metrics on localhost:PORT/metrics",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip pages finished by the last run of this module",
+    )
+    parser.add_argument(
+        "--page-cache",
+        action="store_true",
+        help="Cache page text on disk and only download pages edited since",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        default=None,
+        help="Write report findings to PATH as .csv, .wiki or JSONL (default: stdout)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        default=None,
+        help="Sample every thread while running and write collapsed stacks to PATH",
+    )
+    args = parser.parse_args()
+    if args.module is None and not args.list:
+        parser.error("a module to run is required, unless listing with --list")
+    return args
 
 
 def setup_logger(verbose: bool):
@@ -78,8 +184,18 @@ def normalise_module_name(module_name: str) -> str:
         return module_name.split("/")[-1][:-3]
 
 
+def list_scripts():
+    found = scripts()
+    width = max((len(script.name) for script in found), default=0)
+    for script in found:
+        print(f"{script.name:<{width}}  {script.kind:<6}  {script.description or ''}")
+
+
 def main():
     args = get_arguments()
+    if args.list:
+        list_scripts()
+        return
     setup_logger(verbose=args.verbose)
 
     module = normalise_module_name(args.module)
@@ -88,9 +204,39 @@ def main():
     ModuleBot = SaphBot.get_entry()
     logger.debug(f"found entry point: {ModuleBot.__name__}")
 
-    options = SaphBotOptions(dry_run=args.dry_run, normalise=args.normalise)
+    options = SaphBotOptions(
+        dry_run=args.dry_run,
+        normalise=args.normalise,
+        workers=args.workers,
+        inflight=args.inflight,
+        save_workers=args.save_workers,
+        edit_rate=args.edit_rate,
+        from_dump=args.from_dump,
+        dump_index=args.dump_index,
+        processes=args.processes,
+        progress_interval=args.progress_interval,
+        metrics_json=args.metrics_json,
+        metrics_port=args.metrics_port,
+        resume=args.resume,
+        page_cache=args.page_cache,
+        output=args.output,
+    )
 
-    ModuleBot(options)._start()
+    bot = ModuleBot(options)
+    if args.profile is None:
+        bot._start()
+        return
+
+    # Worker processes from --processes aren't sampled.
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        bot._start()
+    finally:
+        profiler.stop()
+        profiler.write_collapsed(args.profile)
+        logger.info(f"wrote {profiler.samples} samples to {args.profile}")
+        profiler.log_breakdown()
 
 
 if __name__ == "__main__":
@@ -17,51 +17,301 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import importlib
 import logging
+import multiprocessing
+import re
+import time
 from abc import abstractmethod
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from queue import Queue
-from threading import Thread
-from typing import Iterable, Optional, Self
+from threading import BoundedSemaphore, Thread
+from typing import Collection, Container, Iterable, Iterator, Optional, Self, Union
 
-from lib.misc import normalise
-from pywikibot.page import Page
+from lib.checkpoint import Checkpoint
+from lib.dump import DumpPage, index_for, iter_pages, iter_titles, scan
+from lib.metrics import Metrics, watch_api
+from lib.misc import chunked, normalise_text
+from lib.pagecache import PageCache
+from lib.preload import Preloader
+from lib.ratelimit import TokenBucket, backoff
+from lib.seen import SeenCache
+from lib.sinks import Finding, Sink, open_sink
+from pywikibot import Site, Timestamp, config
+from pywikibot.exceptions import (
+    APIError,
+    EditConflictError,
+    InvalidPageError,
+    MaxlagTimeoutError,
+    NoPageError,
+    OtherPageSaveError,
+    PageDeletedConflictError,
+    ServerError,
+)
+from pywikibot.page import Page, Revision, User
 
 logger = logging.getLogger("saphbot.core")
 
+# API error codes worth retrying rather than giving up on the page.
+TRANSIENT_API_ERRORS = {
+    "maxlag",
+    "ratelimited",
+    "readonly",
+    "internal_api_error_DBConnectionError",
+    "internal_api_error_DBQueryError",
+}
+MAX_SAVE_RETRIES = 5
+MAX_CONFLICT_RETRIES = 3
+
+
+def _retry_delay(page: Page, error: Exception, attempt: int) -> Optional[float]:
+    """
+    Return how long to wait before retrying a failed save, or None if the
+    error isn't transient.
+    """
+    # pywikibot wraps anything that isn't a PageSaveRelatedError.
+    if isinstance(error, OtherPageSaveError) and isinstance(error.reason, Exception):
+        error = error.reason
+
+    lag = 0.0
+    if isinstance(error, APIError):
+        if error.code not in TRANSIENT_API_ERRORS:
+            return None
+        lag = float(error.other.get("lag", 0))
+    elif not isinstance(error, (ServerError, MaxlagTimeoutError)):
+        return None
+
+    # pywikibot records any Retry-After header on the site's throttle.
+    retry_after = page.site.throttle.retry_after
+    return max(backoff(attempt), lag, retry_after)
+
+
+def _set_text(page: Page, text: str):
+    # Going through the `text` setter would run botMayEdit(), which loads
+    # the page from the wiki to look for {{nobots}}.
+    page._text = text
+
+
+Prefilter = Union[Collection[str], re.Pattern[str]]
+
+
+def _passes(prefilter: Optional[Prefilter], text: str) -> bool:
+    if prefilter is None:
+        return True
+    if isinstance(prefilter, re.Pattern):
+        return prefilter.search(text) is not None
+    return all(needle in text for needle in prefilter)
+
+
+def _offline_page(title: str, ns: int, text: str) -> Page:
+    """
+    Build a page with known text without loading anything from the wiki.
+    """
+    page = (User if ns == 2 else Page)(Site(), title)
+    _set_text(page, text)
+    return page
+
+
+@dataclass
+class _Job:
+    page: Page
+    # The revision treat() worked from, recorded when the page was fetched
+    # and sent back with the edit so that MediaWiki can detect conflicts.
+    revid: Optional[int] = None
+    timestamp: Optional[Timestamp] = None
+    conflicts: int = 0
+    # Text the page had before treat(), to tell no-op edits apart.
+    original: Optional[str] = None
+    # True if treat() already ran elsewhere, e.g. in a scan worker.
+    treated: bool = False
+    # When the page left the generator, for end-to-end latency.
+    started: float = field(default_factory=time.monotonic)
+    # Set when the page is given up on, so that a resumed run tries it
+    # again.
+    failed: bool = False
+
+    def record_base(self):
+        try:
+            revision = self.page.latest_revision
+        except (NoPageError, InvalidPageError):
+            return
+        self.revid = revision.revid
+        self.timestamp = revision.timestamp
+
+    def refetch(self, live: Optional[Page] = None):
+        """
+        Start the job over from `live`, or a fresh copy of its page.
+        """
+        page = self.page
+        self.page = type(page)(page.site, page.title()) if live is None else live
+        self.revid = self.timestamp = None
+        self.original = None
+        self.treated = False
+
+    def live_page(self) -> Page:
+        """
+        A copy of a page read from a dump, to be loaded from the wiki. It
+        already holds the dumped revision, so loading it without content
+        shows whether that is still the latest, and if it is, neither
+        reading its text nor saving it downloads the revision again.
+        """
+        page = self.page
+        live = type(page)(page.site, page.title())
+        live._revisions[self.revid] = Revision(
+            revid=self.revid,
+            timestamp=self.timestamp,
+            slots={"main": {"*": self.original}},
+        )
+        return live
+
+    def confirm(self, live: Page) -> bool:
+        """
+        Switch a job read from a dump over to `live`, its live_page() as
+        loaded from the wiki, if that is still at the dumped revision.
+        """
+        if live.latest_revision_id != self.revid:
+            return False
+        _set_text(live, self.page.text)
+        self.page = live
+        return True
+
 
 @dataclass
 class SaphBotOptions:
     dry_run: bool
     normalise: bool
+    # None lets ThreadPoolExecutor pick its default.
+    workers: Optional[int] = None
+    # Upper bound on pages between fetch and save at any one time.
+    inflight: int = 64
+    save_workers: int = 4
+    # Edits per second; None derives it from put_throttle in user-config.
+    edit_rate: Optional[float] = None
+    # Read the generator's pages from this XML dump instead of the wiki.
+    from_dump: Optional[str] = None
+    # Multistream index of the dump; guessed from its name if None.
+    dump_index: Optional[str] = None
+    # Number of worker processes treating pages; None keeps everything
+    # in this process.
+    processes: Optional[int] = None
+    # Seconds between progress lines; 0 turns them off.
+    progress_interval: float = 60.0
+    # Write a JSON summary of the run's metrics here at exit.
+    metrics_json: Optional[str] = None
+    # Serve Prometheus-style metrics on this port while running.
+    metrics_port: Optional[int] = None
+    # Skip pages finished by an earlier run instead of starting over.
+    resume: bool = False
+    # Keep page text on disk and only download pages that changed.
+    page_cache: bool = False
+    # Where report bots write their findings, by extension; "-" is stdout.
+    output: Optional[str] = None
 
 
-# Subclasses must implement gen, summary, and treat.
+# Subclasses must implement gen (or generator) and summary, and either
+# transform, or treat if they need more of a page than its title and text.
 class SaphBot:
     gen: Iterable[Page]
     summary: str
-    _save_queue: Queue[Optional[Page]]
+    # Namespaces the bot works on, used to filter dumps.
+    namespaces: Optional[Container[int]] = None
+    # Cheap check on the raw text before treat(): either substrings which
+    # must all appear, or a regex which must match. Pages that fail it are
+    # never parsed or queued for saving.
+    prefilter: Optional[Prefilter] = None
+    # False if the generator already yields pages with their text loaded.
+    preload: bool = True
+    # Pages handed to prepare() at a time.
+    batch: int = 500
+    # With --from-dump, only the dump pages that generator() yields are
+    # worked on. True works on every page in `namespaces` instead, without
+    # running the generator, for bots whose transform() leaves alone any
+    # page it has no business with.
+    dump_all: bool = False
+    # Skip pages that any run handled within this many seconds; unlike
+    # --resume, this holds across complete runs.
+    seen_ttl: Optional[float] = None
+    _save_queue: Queue[Optional[_Job]]
     _executor: ThreadPoolExecutor
+    _inflight: BoundedSemaphore
+    _limiter: TokenBucket
+    _processes: Optional[ProcessPoolExecutor] = None
+    _metrics: Metrics
+    _checkpoint: Optional[Checkpoint] = None
+    _page_cache: Optional[PageCache] = None
+    _seen: Optional[SeenCache] = None
     __options: SaphBotOptions
 
-    @abstractmethod
+    def transform(self, title: str, text: str) -> Optional[str]:
+        """
+        Return a page's new text, or None to leave it alone. Given nothing
+        but the title and text, it runs the same on live pages, on dumps,
+        in worker processes and under transform_pages().
+
+        Not abstract, since bots may override treat() instead: whether a
+        subclass overrides this is what _transforms() checks, and the
+        error below is only reached if something calls it regardless.
+        """
+        raise NotImplementedError(f"{type(self).__name__} only implements treat()")
+
+    def generator(self) -> Iterable[Page]:
+        """
+        The pages to work on. Overriding this instead of setting gen puts
+        off building sites, categories and the like until the bot runs,
+        so that importing a script never talks to the wiki.
+        """
+        return self.gen
+
     def treat(self, page: Page) -> Optional[Page]:
-        pass
+        text = self.transform(page.title(), page.text)
+        if text is None:
+            return None
+        _set_text(page, text)
+        return page
+
+    def prepare(self, pages: list[Page]):
+        """
+        Called with every batch of pages, text loaded, before any of them
+        is treated, for lookups that are cheaper made for many pages at
+        once. Runs in this process only, so anything that treat() needs
+        from it in worker processes has to go through a disk cache.
+        """
+
+    @classmethod
+    def _transforms(cls) -> bool:
+        return cls.transform is not SaphBot.transform
+
+    @classmethod
+    def _prepares(cls) -> bool:
+        return cls.prepare is not SaphBot.prepare
 
     def __init__(self, options: SaphBotOptions):
         self.__options = options
-        self._save_queue = Queue(maxsize=25)
+        # No maxsize: the in-flight window already bounds the queue.
+        self._save_queue = Queue()
         self._saver = self._saver_dry if self.__options.dry_run else self._saver_wet
-        self._executor = ThreadPoolExecutor()
+        self._executor = ThreadPoolExecutor(max_workers=self.__options.workers)
+        self._inflight = BoundedSemaphore(self.__options.inflight)
+        self._limiter = TokenBucket(
+            self.__options.edit_rate or 1 / max(config.put_throttle, 0.1)
+        )
+        self._metrics = Metrics()
+        self._metrics.gauge("save_queue", self._save_queue.qsize)
+        self._metrics.gauge(
+            "inflight", lambda: self._metrics["started"] - self._metrics["finished"]
+        )
 
     # Subclass bullshittery.
 
-    __subclass: type[Self]
+    __subclass: Optional[type[Self]] = None
 
     def __init_subclass__(cls):
         super().__init_subclass__()
-        if cls is SaphBot:
+        # Base classes like ReportBot aren't entry points.
+        if cls.__module__ == __name__:
             return
         SaphBot.__subclass = cls
 
@@ -72,48 +322,532 @@ class SaphBot:
             raise RuntimeError
         return cls.__subclass
 
+    def _count(self, key: str, n: int = 1):
+        self._metrics.count(key, n)
+
+    def _release(self, job: _Job):
+        self._metrics.observe("page", time.monotonic() - job.started)
+        self._count("finished")
+        if not job.failed:
+            if self._checkpoint is not None:
+                self._checkpoint.mark(job.page.title(), job.revid)
+            if self._seen is not None:
+                self._seen.add(job.page.title())
+        self._inflight.release()
+
     # To avoid having a check on self.__options.dry_run every
     # time we save, initialise with one of two separate
     # versions of saver.
 
     def _saver_wet(self):
         while True:
-            page = self._save_queue.get()
-            if page is None:
+            job = self._save_queue.get()
+            if job is None:
                 break
-            logger.info(f"attempting to save {page.title()}")
+            requeued = False
             try:
-                page.save(self.summary, quiet=True)
-            except Exception as e:
-                print(type(e))
-                logger.error(f"failed to save {page.title()}: {e}")
-            self._save_queue.task_done()
+                requeued = self._save(job)
+            finally:
+                if not requeued:
+                    self._release(job)
 
     def _saver_dry(self):
         while True:
-            page = self._save_queue.get()
-            if page is None:
+            job = self._save_queue.get()
+            if job is None:
                 break
-            logger.info(f"dry run: saving {page.title()}")
-            self._save_queue.task_done()
+            logger.info(f"dry run: saving {job.page.title()}")
+            self._count("saved")
+            self._release(job)
 
-    def _processor(self, page: Page):
+    def _save(self, job: _Job) -> bool:
+        """
+        Save a treated page, returning True if it was instead handed back
+        to the workers to be fetched and treated again after a conflict.
+        """
+        page = job.page
+        base = {}
+        if job.revid is not None:
+            base = {"baserevid": job.revid, "basetimestamp": job.timestamp}
+
+        for attempt in range(MAX_SAVE_RETRIES + 1):
+            self._limiter.acquire()
+            logger.info(f"attempting to save {page.title()}")
+            try:
+                with self._metrics.time("save"):
+                    page.save(self.summary, quiet=True, **base)
+            except EditConflictError as e:
+                self._count("conflicts")
+                if (
+                    isinstance(e, PageDeletedConflictError)
+                    or job.conflicts == MAX_CONFLICT_RETRIES
+                ):
+                    logger.error(f"failed to save {page.title()}: {e}")
+                    self._count("failed")
+                    job.failed = True
+                    return False
+                logger.warning(f"edit conflict on {page.title()}, treating again")
+                job.conflicts += 1
+                job.refetch()
+                self._executor.submit(self._processor, job)
+                return True
+            except Exception as e:
+                delay = _retry_delay(page, e, attempt)
+                if delay is None or attempt == MAX_SAVE_RETRIES:
+                    logger.error(f"failed to save {page.title()}: {e}")
+                    self._count("failed")
+                    job.failed = True
+                    return False
+                logger.warning(
+                    f"failed to save {page.title()}, retrying in {delay:.1f}s: {e}"
+                )
+                self._count("retried")
+                self._limiter.pause(delay)
+                self._limiter.slow_down()
+            else:
+                self._limiter.speed_up()
+                self._count("saved")
+                # Checkpointed as of our own edit, so that resuming skips
+                # the page unless someone else edits it after us.
+                job.revid = page.latest_revision_id
+                return False
+        return False
+
+    # Every page holds one slot of the in-flight window from the moment
+    # it leaves the generator until it is saved or dropped, so neither
+    # the executor nor the save queue can grow past the window.
+
+    def _processor(self, job: _Job):
+        page = job.page
+        handed_off = False
         try:
             logger.debug(f"processing {page.title()}")
-            new = self.treat(page)
-            if new is not None:
-                if self.__options.normalise:
-                    new = normalise(new)
-                self._save_queue.put(new)
+            if job.original is None:
+                with self._metrics.time("fetch"):
+                    if job.revid is None:
+                        job.record_base()
+                    job.original = page.text
+                self._count("fetched")
+
+            if job.treated:
+                new = page
+            elif not _passes(self.prefilter, job.original):
+                self._count("prefiltered")
+                return
+            else:
+                with self._metrics.time("treat"):
+                    if self._processes is not None:
+                        new = self._treat_remote(self._processes, page)
+                    else:
+                        new = self.treat(page)
+                self._count("treated")
+            if new is None:
+                self._count("skipped")
+                return
+            # Checked before normalising so that treat() doing nothing
+            # never turns into a whitespace-only edit.
+            if new.text == job.original:
+                self._count("unchanged")
+                return
+            if self.__options.normalise:
+                with self._metrics.time("normalise"):
+                    _set_text(new, normalise_text(new.text))
+            job.page = new
+            self._save_queue.put(job)
+            handed_off = True
         except Exception as e:
             logger.error(f"error processing {page.title()}: {e}")
+            self._count("failed")
+            job.failed = True
+        finally:
+            if not handed_off:
+                self._release(job)
+
+    def _treat_remote(
+        self, processes: ProcessPoolExecutor, page: Page
+    ) -> Optional[Page]:
+        """
+        Run treat() on the page's text in a worker process, leaving this
+        thread free of the GIL while it waits.
+        """
+        text = processes.submit(
+            _treat_text,
+            type(self).__module__,
+            self.__options,
+            page.title(),
+            page.namespace().id,
+            page.text,
+        ).result()
+        if text is None:
+            return None
+        _set_text(page, text)
+        return page
+
+    def _pages(self) -> Iterator[Page]:
+        pages = self.generator()
+        # Finished pages are dropped by title before anything is loaded.
+        if self._checkpoint is not None and self.__options.resume:
+            pages = self._checkpoint.pending(pages, lambda _: self._count("resumed"))
+        if self._seen is not None:
+            pages = self._seen.filter(pages, lambda _: self._count("seen"))
+        if self.preload:
+            pages = Preloader(metrics=self._metrics, cache=self._page_cache)(pages)
+        return iter(pages)
+
+    def _jobs(self) -> Iterator[_Job]:
+        if self.__options.from_dump is None:
+            for page in self._pages():
+                yield _Job(page)
+            return
+        yield from self._confirmed(self._dumped(self.__options.from_dump))
+
+    def _dumped(self, path: str) -> Iterator[_Job]:
+        """
+        Jobs for the pages of the dump at `path` that the bot works on,
+        already treated if the dump is scanned in worker processes.
+        """
+        index = self.__options.dump_index or index_for(path)
+        titles = None
+        if not self.dump_all:
+            titles = {page.title() for page in self.generator()}
+            logger.info(f"looking for {len(titles)} pages in {path}")
+
+        treated: Iterator[tuple[DumpPage, str]]
+        if self.__options.processes is not None:
+            if index is None:
+                raise ValueError(f"no multistream index found for {path}")
+            treat = partial(_treat_dumped, type(self).__module__, self.__options)
+            treated = scan(
+                path,
+                index,
+                treat,
+                self.namespaces,
+                self.__options.processes,
+                titles=titles,
+            )
+        else:
+            if titles is None:
+                entries = iter_pages(path, self.namespaces)
+            elif index is not None:
+                entries = iter_titles(path, index, titles, self.namespaces)
+            else:
+                entries = (
+                    entry
+                    for entry in iter_pages(path, self.namespaces)
+                    if entry.title in titles
+                )
+            treated = ((entry, entry.text) for entry in entries)
+
+        for entry, text in treated:
+            if (
+                self._checkpoint is not None
+                and self.__options.resume
+                and self._checkpoint.done(entry.title, entry.revid)
+            ):
+                self._count("resumed")
+                continue
+            if self._seen is not None and entry.title in self._seen:
+                self._count("seen")
+                continue
+            yield _Job(
+                _offline_page(entry.title, entry.ns, text),
+                revid=entry.revid,
+                timestamp=Timestamp.fromISOformat(entry.timestamp),
+                original=entry.text,
+                treated=self.__options.processes is not None,
+            )
+
+    def _confirmed(self, jobs: Iterator[_Job]) -> Iterator[_Job]:
+        """
+        Look up the latest revisions of dumped pages a batch at a time and
+        switch the jobs still at the dumped revision over to the live
+        page. Pages edited since are started over from the wiki; deleted
+        ones are dropped.
+        """
+        dumped: dict[str, _Job] = {}
+
+        def live() -> Iterator[Page]:
+            for job in jobs:
+                dumped[job.page.title()] = job
+                yield job.live_page()
+
+        preloader = Preloader(metrics=self._metrics, content=False)
+        for page in preloader(live()):
+            job = dumped.pop(page.title())
+            if not page.exists():
+                logger.debug(f"{page.title()} was deleted since the dump")
+                self._count("stale")
+                continue
+            if not job.confirm(page):
+                logger.debug(f"{page.title()} changed since the dump")
+                self._count("stale")
+                job.refetch(page)
+            yield job
+
+    def _log_totals(self, metrics: Metrics):
+        elapsed = metrics.elapsed()
+        saved = metrics["saved"]
+        logger.info(
+            f"saved {saved} pages in {elapsed:.1f}s "
+            f"({saved / elapsed if elapsed else 0:.2f} saves/s), "
+            f"{metrics['retried']} retries, "
+            f"{metrics['conflicts']} edit conflicts, "
+            f"{metrics['failed']} failures"
+        )
+        logger.info(f"skipped {metrics['unchanged']} pages left unchanged")
+
+    def _prepared(self, jobs: Iterator[_Job]) -> Iterator[_Job]:
+        for batch in chunked(jobs, self.batch):
+            # Pages from a dump scan were already treated in the workers.
+            pages = [job.page for job in batch if not job.treated]
+            if pages:
+                with self._metrics.time("prepare"):
+                    self.prepare(pages)
+            yield from batch
 
     def _start(self):
-        saver = Thread(target=self._saver, daemon=True)
-        saver.start()
-        for _ in self._executor.map(self._processor, self.gen):
-            pass
-        self._save_queue.join()
-        self._save_queue.put(None)
-        saver.join()
+        if not self.__options.dry_run:
+            # The token bucket paces saves across all savers, so
+            # pywikibot's own per-save delay would only serialise them.
+            Site().throttle.writedelay = 0
+
+        # Dump scans bring their own process pool.
+        if self.__options.processes is not None and self.__options.from_dump is None:
+            self._processes = ProcessPoolExecutor(
+                self.__options.processes,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+
+        # Dry runs keep their own record, so that resuming a real run never
+        # skips pages that were only pretended to be saved.
+        name = type(self).__module__ + (".dry" if self.__options.dry_run else "")
+        self._checkpoint = Checkpoint(name)
+        if self.__options.resume:
+            logger.info(
+                f"resuming: {len(self._checkpoint)} pages already done "
+                f"according to {self._checkpoint.path}"
+            )
+        else:
+            self._checkpoint.clear()
+
+        if self.__options.page_cache:
+            self._page_cache = PageCache()
+
+        if self.seen_ttl is not None:
+            self._seen = SeenCache(name, self.seen_ttl)
+
+        metrics = self._metrics
+        watch_api(metrics)
+        if self.__options.progress_interval:
+            metrics.report_every(self.__options.progress_interval)
+        if self.__options.metrics_port is not None:
+            metrics.serve(self.__options.metrics_port)
+
+        savers = [
+            Thread(target=self._saver, name=f"saver-{i}", daemon=True)
+            for i in range(self.__options.save_workers)
+        ]
+        for saver in savers:
+            saver.start()
+        jobs = self._jobs()
+        if self._prepares():
+            jobs = self._prepared(jobs)
+        for job in jobs:
+            self._inflight.acquire()
+            job.started = time.monotonic()
+            self._count("started")
+            self._executor.submit(self._processor, job)
+        # Reclaiming the whole window waits for every page to be done.
+        for _ in range(self.__options.inflight):
+            self._inflight.acquire()
+        for _ in savers:
+            self._save_queue.put(None)
+        for saver in savers:
+            saver.join()
         self._executor.shutdown(wait=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=True)
+        metrics.close()
+        self._checkpoint.close()
+        if self._page_cache is not None:
+            self._page_cache.close()
+        if self._seen is not None:
+            self._seen.close()
+
+        self._log_totals(metrics)
+        if self.prefilter is not None:
+            logger.info(f"prefilter rejected {metrics['prefiltered']} pages")
+        if self.__options.resume:
+            logger.info(f"skipped {metrics['resumed']} pages done by an earlier run")
+        if self._seen is not None:
+            logger.info(f"skipped {metrics['seen']} pages handled recently")
+        for line in metrics.stages():
+            logger.info(line)
+        if self.__options.metrics_json is not None:
+            metrics.write_json(self.__options.metrics_json)
+
+
+class ReportBot(SaphBot):
+    """
+    A bot that reports on pages instead of editing them. Subclasses
+    implement generator() and scan(), which yields a finding, as a dict of
+    columns, for everything on a page worth reporting; the page title is
+    added as the first column. Pages go through the same fetch and treat
+    pipeline as edits, with the same metrics and checkpoint, and findings
+    are streamed to the sink named by the `output` option.
+
+    Findings are buffered, so a run that is killed outright, rather than
+    interrupted, can lose some whose pages --resume then skips.
+    """
+
+    summary = ""
+    _sink: Sink
+
+    def __init__(self, options: SaphBotOptions):
+        # Findings would be written from the worker processes.
+        if options.processes is not None:
+            raise ValueError(f"{type(self).__name__} doesn't support --processes")
+        super().__init__(options)
+        self._output = options.output or "-"
+        self._append = options.resume
+
+    @abstractmethod
+    def scan(self, page: Page) -> Iterable[Finding]:
+        pass
+
+    def treat(self, page: Page) -> None:
+        title = page.title()
+        for finding in self.scan(page):
+            self._sink.write({"title": title, **finding})
+            self._count("findings")
+
+    def _log_totals(self, metrics: Metrics):
+        elapsed = metrics.elapsed()
+        logger.info(
+            f"scanned {metrics['treated']} pages in {elapsed:.1f}s, "
+            f"{metrics['findings']} findings, {metrics['failed']} failures"
+        )
+
+    def _start(self):
+        self._sink = open_sink(self._output, append=self._append)
+        try:
+            super()._start()
+        finally:
+            self._sink.close()
+
+
+# Worker-process side of --processes. Pages cross the process boundary as
+# plain (title, namespace, text); each process imports the script once and
+# keeps its own instance of the bot. Workers come from a forkserver: they
+# are started while the worker and saver threads are running, and a plain
+# fork() can hand a child a lock that one of those threads was holding.
+
+_bots: dict[str, SaphBot] = {}
+
+
+def _bot(module: str, options: SaphBotOptions) -> SaphBot:
+    bot = _bots.get(module)
+    if bot is None:
+        importlib.import_module(module)
+        bot = _bots[module] = SaphBot.get_entry()(options)
+    return bot
+
+
+def _transformed(bot: SaphBot, title: str, ns: int, text: str) -> Optional[str]:
+    """
+    Return the new text `bot` gives a page, or None if there is nothing to
+    save.
+    """
+    if not _passes(bot.prefilter, text):
+        return None
+    if bot._transforms():
+        new = bot.transform(title, text)
+    else:
+        page = bot.treat(_offline_page(title, ns, text))
+        new = None if page is None else page.text
+    if new is None or new == text:
+        return None
+    return new
+
+
+def _treat_text(
+    module: str, options: SaphBotOptions, title: str, ns: int, text: str
+) -> Optional[str]:
+    """
+    Run a bot on a page's raw text, returning the new text or None if
+    there is nothing to save.
+    """
+    return _transformed(_bot(module, options), title, ns, text)
+
+
+def _treat_dumped(
+    module: str, options: SaphBotOptions, entry: DumpPage
+) -> Optional[tuple[DumpPage, str]]:
+    try:
+        text = _treat_text(module, options, entry.title, entry.ns, entry.text)
+    except Exception as e:
+        logger.error(f"error processing {entry.title}: {e}")
+        return None
+    return None if text is None else (entry, text)
+
+
+def _transform_chunk(
+    bot: Union[str, SaphBot],
+    options: SaphBotOptions,
+    chunk: list[tuple[str, str]],
+) -> list[tuple[str, str]]:
+    if isinstance(bot, str):
+        bot = _bot(bot, options)
+    changed = []
+    for title, text in chunk:
+        try:
+            # Namespaces only matter to bots that implement treat().
+            new = _transformed(bot, title, 0, text)
+        except Exception as e:
+            logger.error(f"error processing {title}: {e}")
+            continue
+        if new is not None:
+            if options.normalise:
+                new = normalise_text(new)
+            changed.append((title, new))
+    return changed
+
+
+def transform_pages(
+    bot: type[SaphBot],
+    pages: Iterable[tuple[str, str]],
+    processes: Optional[int] = None,
+    normalise: bool = False,
+    chunksize: int = 64,
+) -> Iterator[tuple[str, str]]:
+    """
+    Run a bot's transform() over (title, text) pairs, e.g. from a dump or
+    a benchmark corpus, yielding (title, new text) for every page it
+    would change, in order. Nothing is fetched or saved.
+
+    With `processes`, chunks of `chunksize` pages are spread over that
+    many worker processes, each importing the bot's module once.
+    """
+    if not bot._transforms():
+        raise TypeError(f"{bot.__name__} has no transform()")
+    options = SaphBotOptions(dry_run=True, normalise=normalise)
+    chunks = chunked(pages, chunksize)
+
+    if processes is None:
+        instance = bot(options)
+        for chunk in chunks:
+            yield from _transform_chunk(instance, options, chunk)
+        return
+
+    work = partial(_transform_chunk, bot.__module__, options)
+    with ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context("forkserver")
+    ) as pool:
+        # A few chunks per process in flight, as in lib.dump.scan().
+        pending: deque[Future[list[tuple[str, str]]]] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(work, chunk))
+            if len(pending) >= 2 * processes:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -1,4 +1,31 @@
-__all__ = ["data_utils", "misc"]
+__all__ = [
+    "category",
+    "checkpoint",
+    "data_utils",
+    "dump",
+    "metrics",
+    "misc",
+    "pagecache",
+    "preload",
+    "profiling",
+    "ratelimit",
+    "registry",
+    "seen",
+    "sinks",
+    "users",
+]
 
+from . import category
+from . import checkpoint
 from . import data_utils
+from . import dump
+from . import metrics
 from . import misc
+from . import pagecache
+from . import preload
+from . import profiling
+from . import ratelimit
+from . import registry
+from . import seen
+from . import sinks
+from . import users
@@ -0,0 +1,184 @@
+"""
+Recursive category membership, listed concurrently and cached on disk.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["CategoryTree"]
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Collection, Iterable, Iterator, Optional
+
+import diskcache
+from pywikibot import Timestamp
+from pywikibot.page import Category, Page
+
+logger = logging.getLogger("saphbot.lib.category")
+
+DIRECTORY = "./.saphbot_cache/categories"
+
+# A category's subcategories and other members, as titles.
+Listing = tuple[list[str], list[str]]
+
+
+class CategoryTree:
+    """
+    The pages in a category and all of its subcategories, like
+    CategorizedPageGenerator(root, recurse=True), but listed `workers`
+    categories at a time instead of one after the other.
+
+    The listings are kept on disk. Within `ttl` seconds of a full listing,
+    later runs only list again the categories that recentchanges shows
+    gaining or losing members since the last run. Past that, everything is
+    listed from scratch, in case a change was missed; `ttl` must stay well
+    inside the wiki's recentchanges retention (90 days on Wikimedia).
+
+    Nothing is fetched until the tree is iterated, and a category's pages
+    are yielded as soon as it has been listed, while the rest of the tree
+    is still being listed.
+    """
+
+    def __init__(
+        self,
+        root: Category,
+        namespaces: Optional[Collection[int]] = None,
+        ttl: float = 7 * 24 * 60 * 60,
+        workers: int = 8,
+        directory: str = DIRECTORY,
+    ):
+        self.root = root
+        self.site = root.site
+        self.namespaces = None if namespaces is None else sorted(set(namespaces))
+        self.ttl = ttl
+        self.workers = workers
+        self.directory = directory
+        self._key = f"{root.title()}|{self.namespaces}"
+
+    def _list(self, title: str) -> Listing:
+        namespaces = None if self.namespaces is None else [14, *self.namespaces]
+        subcats, pages = [], []
+        for member in Category(self.site, title).members(namespaces=namespaces):
+            if member.namespace() == 14:
+                subcats.append(member.title())
+            else:
+                pages.append(member.title())
+        return subcats, pages
+
+    def _refresh(
+        self, titles: Iterable[str], listings: dict[str, Listing]
+    ) -> Iterator[tuple[str, Listing]]:
+        """
+        List `titles` again, along with any subcategory found on the way
+        that hasn't been listed yet, yielding each listing as it arrives.
+        `listings` is updated as they do.
+        """
+        queued = set(titles)
+        with ThreadPoolExecutor(
+            self.workers, thread_name_prefix="category"
+        ) as executor:
+            pending: dict[Future[Listing], str] = {
+                executor.submit(self._list, title): title for title in queued
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        title = pending.pop(future)
+                        listings[title] = future.result()
+                        for subcat in listings[title][0]:
+                            if subcat not in listings and subcat not in queued:
+                                queued.add(subcat)
+                                pending[executor.submit(self._list, subcat)] = subcat
+                        yield title, listings[title]
+            finally:
+                # If the caller stops early, don't wait on listings nobody
+                # will read.
+                for future in pending:
+                    future.cancel()
+        logger.debug(f"listed {len(queued)} categories under {self.root.title()}")
+
+    def _changed(self, since: Timestamp) -> set[str]:
+        """
+        Categories whose membership changed after `since`.
+        """
+        changes = self.site.recentchanges(
+            start=since, reverse=True, changetype="categorize", namespaces=[14]
+        )
+        return {change["title"] for change in changes}
+
+    def _reachable(self, listings: dict[str, Listing]) -> dict[str, Listing]:
+        root = self.root.title()
+        reachable = {}
+        queue = [root]
+        while queue:
+            title = queue.pop()
+            if title in reachable or title not in listings:
+                continue
+            reachable[title] = listings[title]
+            queue.extend(listings[title][0])
+        return reachable
+
+    def _walk(self) -> Iterator[tuple[str, Listing]]:
+        """
+        Bring the cached listings up to date, yielding each category's as
+        soon as it's known, and save them once all of them are.
+        """
+        with diskcache.Cache(self.directory) as cache:
+            cached = cache.get(self._key)
+            # Taken before listing anything, so that changes made while
+            # listing are picked up next time.
+            synced = self.site.server_time()
+            if cached is None or time.time() - cached["built"] > self.ttl:
+                logger.info(f"listing {self.root.title()} from scratch")
+                built = time.time()
+                listings: dict[str, Listing] = {}
+                yield from self._refresh([self.root.title()], listings)
+            else:
+                built = cached["built"]
+                listings = cached["listings"]
+                stale = self._changed(cached["synced"]) & listings.keys()
+                logger.info(
+                    f"{len(stale)} of {len(listings)} categories under "
+                    f"{self.root.title()} changed since the last run"
+                )
+                # A changed category may have lost subcategories, so what's
+                # still in the tree is only known once they're all listed.
+                if stale:
+                    for _ in self._refresh(stale, listings):
+                        pass
+                # Subcategories removed since the last run drop out here.
+                listings = self._reachable(listings)
+                yield from listings.items()
+            cache.set(
+                self._key, {"built": built, "synced": synced, "listings": listings}
+            )
+
+    def listings(self) -> dict[str, Listing]:
+        """
+        Bring the cached listings up to date and return them.
+        """
+        return dict(self._walk())
+
+    def __iter__(self) -> Iterator[Page]:
+        # Pages in several subcategories are only yielded once.
+        seen: set[str] = set()
+        for _, (_, pages) in self._walk():
+            for title in pages:
+                if title not in seen:
+                    seen.add(title)
+                    yield Page(self.site, title)
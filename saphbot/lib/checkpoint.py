@@ -0,0 +1,104 @@
+"""
+On-disk record of the pages a bot run has finished with, for --resume.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["Checkpoint"]
+
+import logging
+import os
+from typing import Callable, Iterable, Iterator, Optional
+
+import diskcache
+from pywikibot import Page
+
+from lib.misc import chunked
+
+logger = logging.getLogger("saphbot.lib.checkpoint")
+
+DIRECTORY = "./.saphbot_cache/checkpoints"
+
+_MISSING = object()
+
+
+class Checkpoint:
+    """
+    Titles a bot has finished with, mapped to the revision it left them at:
+    its own edit if it saved one, otherwise the one it worked from (None
+    if the page was never fetched, e.g. it doesn't exist). A page edited
+    by someone else since then isn't done any more.
+
+    Every mark() is committed on its own, so a run that crashes or is
+    interrupted loses at most the pages that were still in flight.
+    """
+
+    def __init__(self, name: str, directory: str = DIRECTORY):
+        self.path = os.path.join(directory, name)
+        self._cache = diskcache.Cache(self.path)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def done(self, title: str, revid: Optional[int]) -> bool:
+        """
+        Whether `title` was finished at `revid`, its latest revision, or a
+        later one, as when that comes from a dump.
+        """
+        marked = self._cache.get(title, _MISSING)
+        if marked is _MISSING:
+            return False
+        if marked is None or revid is None:
+            # Missing when marked; done if it still is.
+            return marked is None and revid is None
+        return marked >= revid
+
+    def mark(self, title: str, revid: Optional[int]):
+        self._cache.set(title, revid)
+
+    def clear(self):
+        self._cache.clear()
+
+    def close(self):
+        self._cache.close()
+
+    def pending(
+        self,
+        pages: Iterable[Page],
+        skipped: Optional[Callable[[Page], None]] = None,
+        batch: int = 500,
+    ) -> Iterator[Page]:
+        """
+        Yield the pages that aren't done, calling `skipped` for every other
+        one. Of each `batch` pages, those marked are loaded without their
+        text, as few requests as the site allows, to see whether they were
+        edited since; the rest are passed on without fetching anything.
+        """
+        for chunk in chunked(pages, batch):
+            marked = [page for page in chunk if page.title() in self._cache]
+            if marked:
+                list(marked[0].site.preloadpages(marked, content=False))
+            for page in chunk:
+                if page.title() in self._cache:
+                    revid = page.latest_revision_id if page.exists() else None
+                    if self.done(page.title(), revid):
+                        if skipped is not None:
+                            skipped(page)
+                        continue
+                yield page
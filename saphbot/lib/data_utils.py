@@ -17,59 +17,170 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-__all__ = ["WiktData", "Languages", "Scripts"]
+__all__ = ["NameTrie", "WiktData", "Languages", "Scripts"]
 
-from cachetools import TTLCache
-from collections import defaultdict
 import json
 import logging
-from pywikibot import Page, Site
+import marshal
+import os
 import threading
+import time
+from typing import Any, Iterable, Optional, Sequence
+from urllib.parse import quote
+
+from pywikibot import Page, Site
 
 logger = logging.getLogger("saphbot.lib.data_utils")
 
+DIRECTORY = "./.saphbot_cache/data"
+# How long a cached copy is trusted before its revid is checked again.
+TTL = 60 * 60
+
+# Title to (when it was loaded, revid, data), for this process.
+_loaded: dict[str, tuple[float, int, Any]] = {}
+_lock = threading.Lock()
+
+
+def _path(title: str) -> str:
+    return os.path.join(DIRECTORY, quote(title, safe="") + ".marshal")
 
-cache = TTLCache(maxsize=1024, ttl=3600)
-locks: defaultdict = defaultdict(threading.RLock)
+
+def _read(path: str) -> Optional[tuple[int, Any]]:
+    """
+    Read a cached (revid, data) pair, or None if there isn't a usable one.
+    """
+    try:
+        with open(path, "rb") as file:
+            return marshal.load(file)
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+
+def _write(path: str, revid: int, data: Any):
+    os.makedirs(DIRECTORY, exist_ok=True)
+    # Written aside and renamed, so that other processes never see half a
+    # file.
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        marshal.dump((revid, data), file)
+    os.replace(temp, path)
+
+
+def _load(title: str) -> tuple[int, Any]:
+    path = _path(title)
+    cached = _read(path)
+    if cached is not None and time.time() - os.path.getmtime(path) < TTL:
+        logger.debug(f"cache hit for {title.split('/')[1]}")
+        return cached
+
+    page = Page(Site(), title)
+    revid = page.latest_revision_id
+    if cached is not None and cached[0] == revid:
+        logger.debug(f"{title.split('/')[1]} unchanged since it was cached")
+        os.utime(path)
+        return cached
+
+    logger.info(f"fetching JSON from {title.split('/')[1]}")
+    res = json.loads(page.text)
+    _write(path, revid, res)
+    return revid, res
 
 
 def _fetch_json(title: str) -> dict[str, str]:
     """
     Fetch the wikitext at `title` and return as a dict parsed from JSON.
+
+    Parsed data is kept on disk under DIRECTORY with the revid it came
+    from, and only fetched again once that revid changes. In memory, it is
+    checked again like the disk copy every TTL seconds; as long as the
+    revid is the same, the same dict is returned.
     """
-    with locks[title]:
-        if title in cache:
-            logger.debug(f"cache hit for {title.split('/')[1]}")
-            return cache[title]
+    with _lock:
+        loaded = _loaded.get(title)
+        if loaded is None or time.time() - loaded[0] >= TTL:
+            revid, res = _load(title)
+            if loaded is not None and loaded[1] == revid:
+                res = loaded[2]
+            loaded = _loaded[title] = (time.time(), revid, res)
+        return loaded[2]
 
-        logger.info(f"fetching JSON from {title.split('/')[1]}")
 
-        page = Page(Site(), title)
-        res = json.loads(page.text)
-        cache[title] = res
+class NameTrie:
+    """
+    Canonical names stored word by word, so that the longest name at the
+    start of a run of words is found in one walk over them.
+    """
 
-        return res
+    def __init__(self, names: dict[str, str]):
+        # Each node maps a word to the next node; the None key marks the
+        # end of a name and holds its code.
+        self._root: dict[Optional[str], Any] = {}
+        for name, code in names.items():
+            node = self._root
+            for word in name.split(" "):
+                node = node.setdefault(word, {})
+            node[None] = code
+
+    def longest_prefix(self, words: Sequence[str]) -> Optional[tuple[int, str]]:
+        """
+        Return how many of `words` the longest name they start with takes
+        up, and that name's code, or None if they start with no name.
+        """
+        node = self._root
+        match = None
+        for i, word in enumerate(words):
+            child: Optional[dict[Optional[str], Any]] = node.get(word)
+            if child is None:
+                break
+            node = child
+            if None in node:
+                match = (i + 1, node[None])
+        return match
 
 
 class WiktData:
     def __init__(self, module: str):
-        self._canonical_names: dict[str, str] = {}
-        self._codes: dict[str, str] = {}
+        self._name_trie: Optional[NameTrie] = None
+        # The names the trie was built from, to rebuild it when they change.
+        self._trie_names: Optional[dict[str, str]] = None
         self._module = module
 
     def get_canonical_names(self) -> dict[str, str]:
-        if self._canonical_names == {}:
-            self._canonical_names = _fetch_json(
-                f"Module:{self._module}/canonical names.json"
-            )
-        return self._canonical_names
+        return _fetch_json(f"Module:{self._module}/canonical names.json")
 
     def get_codes(self) -> dict[str, str]:
-        if self._codes == {}:
-            self._codes = _fetch_json(
-                f"Module:{self._module}/code to canonical name.json"
-            )
-        return self._codes
+        return _fetch_json(f"Module:{self._module}/code to canonical name.json")
+
+    def get_name_trie(self) -> NameTrie:
+        names = self.get_canonical_names()
+        if self._name_trie is None or self._trie_names is not names:
+            self._name_trie = NameTrie(names)
+            self._trie_names = names
+        return self._name_trie
+
+    def split_name(self, text: str) -> Optional[tuple[str, str]]:
+        """
+        Split e.g. a category name into the code of the longest canonical
+        name it starts with and the words after that name, or return None
+        if it doesn't start with one. Words are separated by whitespace.
+        """
+        words = text.split()
+        match = self.get_name_trie().longest_prefix(words)
+        if match is None:
+            return None
+        length, code = match
+        return code, " ".join(words[length:])
+
+    def split_names(self, texts: Iterable[str]) -> list[Optional[tuple[str, str]]]:
+        """
+        split_name() for many texts at once, splitting repeats only once.
+        """
+        texts = list(texts)
+        done: dict[str, Optional[tuple[str, str]]] = {}
+        for text in texts:
+            if text not in done:
+                done[text] = self.split_name(text)
+        return [done[text] for text in texts]
 
 
 class Languages(WiktData):
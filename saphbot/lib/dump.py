@@ -0,0 +1,278 @@
+"""
+Utilities for reading pages from XML dumps.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = [
+    "DumpPage",
+    "index_for",
+    "iter_index",
+    "iter_pages",
+    "iter_streams",
+    "iter_titles",
+    "open_dump",
+    "scan",
+]
+
+import bz2
+import gzip
+import io
+import logging
+import multiprocessing
+import os
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from lxml import etree  # type: ignore
+from typing import (
+    IO,
+    AbstractSet,
+    Callable,
+    Collection,
+    Container,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    cast,
+)
+
+logger = logging.getLogger("saphbot.lib.dump")
+
+R = TypeVar("R")
+
+
+class DumpPage(NamedTuple):
+    title: str
+    ns: int
+    revid: int
+    timestamp: str
+    text: str
+
+
+def open_dump(path: str) -> IO[bytes]:
+    """
+    Open a dump for reading, decompressing .bz2 (including multistream)
+    and .gz files on the fly.
+    """
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        # Typed as GzipFile, which typeshed doesn't count as an IO[bytes].
+        return cast(IO[bytes], gzip.open(path, "rb"))
+    return open(path, "rb")
+
+
+def _parse(
+    source: IO[bytes], namespaces: Optional[Container[int]]
+) -> Iterator[DumpPage]:
+    """
+    Stream pages out of `source` in constant memory.
+
+    Only the <ns>, <text> and <page> elements are reported. <ns> precedes
+    <text> in the export schema, so text of pages in other namespaces is
+    thrown away before lxml hands it to Python as a string. Finished pages
+    are cleared and unlinked from the root, since clearing alone still
+    leaves an empty element per page in the tree.
+    """
+    iterator = etree.iterparse(
+        source,
+        events=("end",),
+        tag=("{*}ns", "{*}text", "{*}page"),
+        huge_tree=True,
+    )
+
+    keep = True
+    for _, elem in iterator:
+        tag = elem.tag.rpartition("}")[2]
+
+        if tag == "ns":
+            keep = namespaces is None or int(elem.text) in namespaces
+        elif tag == "text":
+            if not keep:
+                elem.clear()
+        else:
+            if keep:
+                revision = elem.find("{*}revision")
+                yield DumpPage(
+                    title=elem.findtext("{*}title"),
+                    ns=int(elem.findtext("{*}ns")),
+                    revid=int(revision.findtext("{*}id")),
+                    timestamp=revision.findtext("{*}timestamp"),
+                    text=revision.findtext("{*}text") or "",
+                )
+
+            elem.clear(keep_tail=True)
+            parent = elem.getparent()
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def iter_pages(
+    path: str, namespaces: Optional[Container[int]] = None
+) -> Iterator[DumpPage]:
+    """
+    Yield the pages of a pages-articles XML dump, optionally only those in
+    `namespaces`.
+    """
+    logger.info(f"reading pages from {path}")
+
+    with open_dump(path) as source:
+        yield from _parse(source, namespaces)
+
+
+def iter_index(path: str) -> Iterator[tuple[int, int, str]]:
+    """
+    Yield (offset, page id, title) from a multistream index, where offset
+    is the byte offset of the bz2 stream holding the page.
+    """
+    with open_dump(path) as raw, io.TextIOWrapper(raw, encoding="utf-8") as lines:
+        for line in lines:
+            offset, page_id, title = line.rstrip("\n").split(":", 2)
+            yield int(offset), int(page_id), title
+
+
+def _read_stream(dump: IO[bytes], offset: int) -> bytes:
+    dump.seek(offset)
+    decompressor = bz2.BZ2Decompressor()
+    chunks = []
+    while not decompressor.eof:
+        block = dump.read(1 << 16)
+        if not block:
+            break
+        chunks.append(decompressor.decompress(block))
+    return b"".join(chunks)
+
+
+def iter_streams(
+    path: str, offsets: Iterable[int], namespaces: Optional[Container[int]] = None
+) -> Iterator[DumpPage]:
+    """
+    Yield the pages in the multistream dump streams starting at `offsets`.
+    """
+    with open(path, "rb") as dump:
+        for offset in offsets:
+            # Each stream holds a run of bare <page> elements; the last one
+            # also closes the <mediawiki> root.
+            data = _read_stream(dump, offset).replace(b"</mediawiki>", b"")
+            yield from _parse(io.BytesIO(b"<pages>" + data + b"</pages>"), namespaces)
+
+
+def iter_titles(
+    path: str,
+    index: str,
+    titles: Iterable[str],
+    namespaces: Optional[Container[int]] = None,
+) -> Iterator[DumpPage]:
+    """
+    Yield the pages with the given titles from a multistream dump, using its
+    index to decompress only the streams that contain them.
+    """
+    wanted = set(titles)
+    offsets = sorted(
+        {offset for offset, _, title in iter_index(index) if title in wanted}
+    )
+    logger.info(f"reading {len(wanted)} pages from {len(offsets)} streams of {path}")
+
+    for page in iter_streams(path, offsets, namespaces):
+        if page.title in wanted:
+            yield page
+
+
+def index_for(path: str) -> Optional[str]:
+    """
+    Guess the index of a multistream dump from the WMF naming scheme.
+    """
+    if not path.endswith("-multistream.xml.bz2"):
+        return None
+    index = path[: -len(".xml.bz2")] + "-index.txt.bz2"
+    return index if os.path.exists(index) else None
+
+
+def _scan_shard(
+    path: str,
+    offsets: list[int],
+    namespaces: Optional[Container[int]],
+    fn: Callable[[DumpPage], Optional[R]],
+    titles: Optional[AbstractSet[str]] = None,
+) -> list[R]:
+    results = []
+    for page in iter_streams(path, offsets, namespaces):
+        if titles is not None and page.title not in titles:
+            continue
+        result = fn(page)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def scan(
+    path: str,
+    index: str,
+    fn: Callable[[DumpPage], Optional[R]],
+    namespaces: Optional[Container[int]] = None,
+    processes: Optional[int] = None,
+    streams_per_shard: int = 10,
+    titles: Optional[Collection[str]] = None,
+) -> Iterator[R]:
+    """
+    Apply `fn` to every page of a multistream dump across a pool of worker
+    processes, yielding the results that aren't None in dump order. With
+    `titles`, only those pages are passed to `fn`, and only the streams
+    holding them are read.
+
+    The dump is sharded by stream offsets from the index, so each worker
+    decompresses and parses its own streams. `fn` must be picklable, i.e.
+    a module-level function or a functools.partial of one. Only a few
+    shards per worker are in flight at once, so a slow consumer doesn't
+    make finished results pile up.
+    """
+    # Each shard only gets sent the titles in its own streams.
+    wanted: Optional[defaultdict[int, set[str]]] = None
+    if titles is None:
+        offsets = sorted({offset for offset, _, _ in iter_index(index)})
+    else:
+        search = set(titles)
+        wanted = defaultdict(set)
+        for offset, _, title in iter_index(index):
+            if title in search:
+                wanted[offset].add(title)
+        offsets = sorted(wanted)
+    shards = [
+        offsets[i : i + streams_per_shard]
+        for i in range(0, len(offsets), streams_per_shard)
+    ]
+    logger.info(f"scanning {len(offsets)} streams of {path} in {len(shards)} shards")
+
+    processes = processes or os.cpu_count() or 1
+    window = 2 * processes
+    work = partial(_scan_shard, path, namespaces=namespaces, fn=fn)
+    # Not fork(): the caller may have threads running, whose held locks a
+    # forked child would inherit.
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(processes, mp_context=context) as pool:
+        pending: deque[Future[list[R]]] = deque()
+        for shard in shards:
+            shard_titles = None
+            if wanted is not None:
+                shard_titles = {title for offset in shard for title in wanted[offset]}
+            pending.append(pool.submit(work, shard, titles=shard_titles))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,301 @@
+"""
+Counters, stage timers and queue gauges for bot runs.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["Histogram", "Metrics", "peak_rss_mib", "watch_api"]
+
+import functools
+import json
+import logging
+import resource
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pywikibot.data.api import Request
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger("saphbot.lib.metrics")
+
+# Upper bounds in seconds, from a cached API hit up to a maxlag backoff.
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Histogram:
+    """
+    A fixed-bucket latency histogram. Not thread-safe on its own; Metrics
+    guards it.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        # One extra slot for everything past the last bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile by interpolating inside its bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Metrics:
+    """
+    Everything a run records about itself: event counters, per-stage
+    latency histograms and gauges read on demand, such as queue depths.
+    Safe to update from any thread.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        # Wall clock, to line the run up with things outside the process.
+        self.started_at = time.time()
+        # Seconds from the start until treat() first returned.
+        self.first_treat: Optional[float] = None
+        self._counters: Counter[str] = Counter()
+        self._stages: dict[str, Histogram] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def __getitem__(self, key: str) -> int:
+        return self._counters[key]
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counters[key] += n
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+            if stage == "treat" and self.first_treat is None:
+                self.first_treat = time.monotonic() - self.started
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def gauge(self, name: str, read: Callable[[], float]):
+        self._gauges[name] = read
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "total": histogram.sum,
+                    "mean": histogram.sum / histogram.count,
+                    "p50": histogram.quantile(0.5),
+                    "p99": histogram.quantile(0.99),
+                }
+                for stage, histogram in self._stages.items()
+            }
+        return {
+            "elapsed": self.elapsed(),
+            "started_at": self.started_at,
+            "first_treat": self.first_treat,
+            "peak_rss_mib": peak_rss_mib(),
+            "counters": counters,
+            "stages": stages,
+            "gauges": {name: read() for name, read in self._gauges.items()},
+        }
+
+    def progress(self) -> str:
+        snapshot = self.snapshot()
+        counters = snapshot["counters"]
+        elapsed = snapshot["elapsed"]
+        saved = counters.get("saved", 0)
+        skipped = sum(
+            counters.get(key, 0) for key in ("prefiltered", "unchanged", "skipped")
+        )
+        gauges = " ".join(f"{k}={v:.0f}" for k, v in snapshot["gauges"].items())
+        return (
+            f"{elapsed:.0f}s: fetched {counters.get('fetched', 0)}, "
+            f"treated {counters.get('treated', 0)}, skipped {skipped}, "
+            f"saved {saved} ({saved / elapsed if elapsed else 0:.2f}/s), "
+            f"failed {counters.get('failed', 0)}, "
+            f"api {counters.get('api_requests', 0)}; {gauges}"
+        )
+
+    def stages(self) -> Iterator[str]:
+        """
+        One line per stage, busiest first, for the end-of-run log.
+        """
+        stages = self.snapshot()["stages"]
+        for stage, s in sorted(stages.items(), key=lambda item: -item[1]["total"]):
+            yield (
+                f"{stage}: {s['count']} calls, {s['total']:.1f}s total, "
+                f"p50 {s['p50'] * 1000:.0f}ms, p99 {s['p99'] * 1000:.0f}ms"
+            )
+
+    def prometheus(self) -> str:
+        """
+        Render everything in the Prometheus text exposition format.
+        """
+        lines = ["# TYPE saphbot_events_total counter"]
+        with self._lock:
+            for key, value in sorted(self._counters.items()):
+                lines.append(f'saphbot_events_total{{event="{key}"}} {value}')
+            lines.append("# TYPE saphbot_stage_seconds histogram")
+            for stage, histogram in sorted(self._stages.items()):
+                cumulative = 0
+                bounds = [*map(str, histogram.buckets), "+Inf"]
+                for bound, n in zip(bounds, histogram.counts):
+                    cumulative += n
+                    lines.append(
+                        f'saphbot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} '
+                        f"{cumulative}"
+                    )
+                lines.append(
+                    f'saphbot_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}'
+                )
+                lines.append(
+                    f'saphbot_stage_seconds_count{{stage="{stage}"}} {histogram.count}'
+                )
+        lines.append("# TYPE saphbot_queue_depth gauge")
+        for name, read in sorted(self._gauges.items()):
+            lines.append(f'saphbot_queue_depth{{queue="{name}"}} {read()}')
+        lines.append("# TYPE saphbot_peak_rss_bytes gauge")
+        lines.append(f"saphbot_peak_rss_bytes {peak_rss_mib() * 2**20:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(self.snapshot(), out, indent=2)
+            out.write("\n")
+
+    def report_every(self, interval: float):
+        """
+        Log a progress line every `interval` seconds until close().
+        """
+
+        def report():
+            while not self._stop.wait(interval):
+                logger.info(self.progress())
+
+        Thread(target=report, name="progress", daemon=True).start()
+
+    def serve(self, port: int):
+        """
+        Serve the Prometheus text format on http://localhost:`port`/metrics.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer(("localhost", port), Handler)
+        Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        logger.info(f"serving metrics on http://localhost:{port}/metrics")
+
+    def close(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+# Request.submit is patched once per process; the wrapper reports to
+# whichever Metrics was installed last.
+_api_metrics: Optional[Metrics] = None
+
+
+def watch_api(metrics: Metrics):
+    """
+    Count and time every API request pywikibot sends. Cached responses
+    never reach Request.submit, so only real round-trips are counted.
+    """
+    global _api_metrics
+    if _api_metrics is None:
+        submit = Request.submit
+
+        @functools.wraps(submit)
+        def timed(request, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return submit(request, *args, **kwargs)
+            finally:
+                _api_metrics.count("api_requests")
+                _api_metrics.observe("api", time.perf_counter() - started)
+
+        Request.submit = timed
+    _api_metrics = metrics
@@ -17,13 +17,27 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-__all__ = ["diff", "merge_templates"]
+__all__ = ["chunked", "diff", "merge_templates", "normalise_text"]
 
 import difflib
+from itertools import islice
 from mwparserfromhell.nodes import Template
 from mwparserfromhell.wikicode import Wikicode
-from pywikibot.page import Page
 import re
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Split an iterable into lists of `size` items, the last possibly
+    shorter, consuming it lazily.
+    """
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
 
 
 def diff(a: str, b: str) -> str:
@@ -78,13 +92,94 @@ def merge_templates(code: Wikicode, templates: list[Template]) -> None:
             cats[lang].add(at, category)
 
 
-def normalise(page: Page) -> Page:
-    text = page.text
-    text = re.sub(r"\t", " ", text)
-    text = re.sub(r"^([;:#*]+)(?=[^;:#*\s])", r"\1 ", text)
-    text = re.sub(r"(?:\n *)*\n==", "\n\n==", text)
-    text = re.sub(r"^((?!=)[^\n]*(?:\n(?!=)[^\n]*?)*?)\n+==", r"\1\n==", text)
-    text = re.sub(r"\n +| +\n", "\n", text)
-    text = re.sub(r"(^|\n)(=+) *([^\n]+?) *\2(\n|$)", r"\1\2\3\2\4", text)
-    page.text = text
-    return page
+# Every pass below is a single left-to-right scan, with regexes only applied
+# within a line. Output is identical to the six re.sub passes this replaced,
+# quirks included; benchmarks/normalise.py checks that.
+_LIST_START = re.compile(r"[;:#*]+(?=[^;:#*\s])")
+_EDGE_SPACES = re.compile(r"\n +|(?<! ) +\n")
+_HEADING = re.compile(r"(=+) *([^\n]+?) *\1")
+
+
+def _heading_gaps(text: str) -> str:
+    """
+    Leave exactly one blank line before each heading, dropping any
+    whitespace-only lines in between.
+    """
+    out = []
+    pos = 0
+    end = text.find("\n==")
+    while end != -1:
+        start = end
+        while start > 0 and text[start - 1] in " \n":
+            start -= 1
+        # Trailing spaces on the line before stay put.
+        start = text.index("\n", start)
+        out.append(text[pos:start])
+        out.append("\n\n")
+        pos = end + 1
+        end = text.find("\n==", end + 3)
+    if not out:
+        return text
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def _first_heading(text: str) -> str:
+    """
+    Drop the blank lines before the first heading, provided no line before
+    it starts with "=".
+    """
+    if not text or text[0] == "=":
+        return text
+    start = text.find("\n=") + 1
+    if start == 0 or not text.startswith("==", start):
+        return text
+    end = start - 1
+    while end > 0 and text[end - 1] == "\n":
+        end -= 1
+    return text[:end] + "\n" + text[start:]
+
+
+def _next_heading(text: str, pos: int) -> int:
+    start = text.find("\n=", pos)
+    return start if start == -1 else start + 1
+
+
+def _headings(text: str) -> str:
+    """
+    Strip the spaces just inside heading markers.
+    """
+    out = []
+    pos = 0
+    start = 0 if text.startswith("=") else _next_heading(text, 0)
+    while start != -1:
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        match = _HEADING.fullmatch(text, start, end)
+        if match is not None:
+            out.append(text[pos:start])
+            out.append(match[1] + match[2] + match[1])
+            pos = end
+            # The old re.sub consumed the newline after a heading, so a
+            # heading on the very next line was left alone.
+            end += 1
+        start = _next_heading(text, end)
+    if not out:
+        return text
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def normalise_text(text: str) -> str:
+    """
+    Normalise whitespace around list markers, headings and line ends.
+    """
+    text = text.replace("\t", " ")
+    if match := _LIST_START.match(text):
+        text = text[: match.end()] + " " + text[match.end() :]
+    text = _heading_gaps(text)
+    text = _first_heading(text)
+    if " \n" in text or "\n " in text:
+        text = _EDGE_SPACES.sub("\n", text)
+    return _headings(text)
@@ -0,0 +1,85 @@
+"""
+A persistent cache of page text, checked against the latest revid.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["PageCache"]
+
+import logging
+import zlib
+
+import diskcache
+from pywikibot.page import BasePage, Revision
+
+logger = logging.getLogger("saphbot.lib.pagecache")
+
+DIRECTORY = "./.saphbot_cache/pages"
+
+# Revision flags that pywikibot infers from the key being present at all.
+_FLAGS = {"anon", "minor", "userhidden", "commenthidden"}
+
+
+def _with_text(revision: Revision, text: str) -> Revision:
+    data = {k: v for k, v in revision.items() if k not in _FLAGS or v}
+    data["slots"] = {"main": {"contentmodel": revision.get("contentmodel"), "*": text}}
+    return Revision(**data)
+
+
+class PageCache:
+    """
+    Wikitext by site and title, stored zlib-compressed along with the
+    revid it belongs to. The least recently used pages are evicted once
+    the cache outgrows `size_limit` bytes.
+    """
+
+    def __init__(self, directory: str = DIRECTORY, size_limit: int = 2**30):
+        self._cache = diskcache.Cache(
+            directory,
+            size_limit=size_limit,
+            eviction_policy="least-recently-used",
+        )
+
+    @staticmethod
+    def _key(page: BasePage) -> tuple[str, str]:
+        return page.site.sitename, page.title()
+
+    def restore(self, page: BasePage) -> bool:
+        """
+        Fill in the text of a page whose revisions were loaded without
+        content, if the cache has its latest revision. Returns whether
+        it did.
+        """
+        entry = self._cache.get(self._key(page))
+        if entry is None:
+            return False
+        revid, data = entry
+        revision = page._revisions.get(getattr(page, "_revid", None))
+        if revision is None or revision.revid != revid:
+            return False
+        page._revisions[revid] = _with_text(revision, zlib.decompress(data).decode())
+        return True
+
+    def put(self, page: BasePage):
+        if not page.has_content() or not page.exists():
+            return
+        revision = page.latest_revision
+        self._cache.set(
+            self._key(page), (revision.revid, zlib.compress(revision.text.encode()))
+        )
+
+    def close(self):
+        self._cache.close()
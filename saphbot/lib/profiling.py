@@ -0,0 +1,136 @@
+"""
+A sampling profiler that sees every thread, for --profile.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["SamplingProfiler"]
+
+import logging
+import re
+import sys
+import threading
+from collections import Counter, defaultdict
+from types import FrameType
+from typing import Collection, Optional
+
+logger = logging.getLogger("saphbot.lib.profiling")
+
+# Functions worth a breakdown of their own in the end-of-run log.
+ROOTS = ("treat", "normalise_text", "merge_templates")
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}"
+
+
+def _thread_group(name: str) -> str:
+    # Pool threads are interchangeable; fold e.g. "ThreadPoolExecutor-0_3"
+    # and "saver-2" into one group each.
+    return re.sub(r"[-_]?\d+(?:_\d+)?$", "", name) or name
+
+
+class SamplingProfiler:
+    """
+    Records the stack of every thread every `interval` seconds.
+
+    cProfile only instruments the thread that enabled it, which for a bot
+    is the one sitting in the generator loop. Sampling
+    sys._current_frames() instead covers the treat() workers and savers
+    too, at a cost that doesn't depend on how many calls they make. Time
+    spent waiting shows up as well, so the result is wall-clock.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        # The code names behind each label, to match ROOTS against.
+        self._names: dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    label = _label(current)
+                    self._names[label] = current.f_code.co_name
+                    stack.append(label)
+                    current = current.f_back
+                stack.append(_thread_group(names.get(ident, str(ident))))
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path: str):
+        """
+        Write the samples as collapsed stacks ("a;b;c count" per line), as
+        read by flamegraph.pl and speedscope.
+        """
+        with open(path, "w", encoding="utf-8") as out:
+            for stack, count in sorted(self.stacks.items()):
+                out.write(f"{';'.join(stack)} {count}\n")
+
+    def breakdown(
+        self, roots: Collection[str] = ROOTS, top: int = 10
+    ) -> dict[str, tuple[int, list[tuple[str, int]]]]:
+        """
+        For each root function, the number of samples inside it and the
+        functions those samples were spent in (innermost frame), most
+        frequent first.
+        """
+        totals: Counter[str] = Counter()
+        leaves: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        for stack, count in self.stacks.items():
+            seen = set()
+            for label in stack[1:]:
+                root = self._names.get(label)
+                if root is None or root not in roots or root in seen:
+                    continue
+                seen.add(root)
+                totals[root] += count
+                leaves[root][stack[-1]] += count
+        return {
+            root: (totals[root], leaves[root].most_common(top))
+            for root in roots
+            if totals[root]
+        }
+
+    def log_breakdown(self, roots: Collection[str] = ROOTS, top: int = 10):
+        for root, (total, functions) in self.breakdown(roots, top).items():
+            logger.info(
+                f"{root}: {total} samples, ~{total * self.interval:.1f}s "
+                "across all threads"
+            )
+            for label, count in functions:
+                logger.info(f"  {100 * count / total:5.1f}%  {label}")
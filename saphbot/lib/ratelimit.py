@@ -0,0 +1,92 @@
+"""
+Adaptive token-bucket rate limiting.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["TokenBucket", "backoff"]
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger("saphbot.lib.ratelimit")
+
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Exponential backoff for the given (zero-based) attempt, with jitter so
+    that several workers failing together don't retry in lockstep.
+    """
+    return min(cap, base * 2**attempt) * random.uniform(0.5, 1.5)
+
+
+class TokenBucket:
+    """
+    A token bucket shared between threads. Tokens refill at `rate` per
+    second up to `burst`; `acquire` blocks until one is available.
+
+    The rate adapts to the server: `slow_down` halves it (down to
+    `min_rate`), `speed_up` climbs back towards the configured rate
+    additively, and `pause` stops handing out tokens altogether, e.g.
+    while honouring maxlag or Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.05):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    elapsed = now - max(self._updated, self._paused_until)
+                    self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                logger.debug(f"pausing for {seconds:.1f}s")
+                self._paused_until = until
+                self._tokens = 0.0
+
+    def slow_down(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            logger.debug(f"rate lowered to {self.rate:.2f}/s")
+
+    def speed_up(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
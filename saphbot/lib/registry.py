@@ -0,0 +1,92 @@
+"""
+The bots in saphbot/scripts, found without importing them.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["Script", "scripts"]
+
+import ast
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger("saphbot.lib.registry")
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts")
+
+# Base classes from core that make a class a bot, and what kind.
+BASES = {"SaphBot": "edit", "ReportBot": "report"}
+
+
+@dataclass
+class Script:
+    # Module name under scripts, as given to `saphbot <module>`.
+    name: str
+    # The bot class, and whether it edits or reports.
+    bot: str
+    kind: str
+    # First paragraph of the module docstring.
+    description: Optional[str]
+
+
+def _base_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _read(path: str) -> Optional[Script]:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            tree = ast.parse(f.read(), filename=path)
+        except SyntaxError as e:
+            logger.warning(f"can't parse {path}: {e}")
+            return None
+    docstring = ast.get_docstring(tree)
+    description = None
+    if docstring:
+        description = " ".join(docstring.strip().split("\n\n")[0].split())
+    # As with SaphBot.get_entry(), the last bot defined wins.
+    found = None
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for base in node.bases:
+            kind = BASES.get(_base_name(base) or "")
+            if kind is not None:
+                found = (node.name, kind)
+    if found is None:
+        return None
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Script(name, *found, description)
+
+
+def scripts(directory: str = DIRECTORY) -> list[Script]:
+    """
+    Every module in `directory` that defines a bot, by name. Modules are
+    only parsed, so nothing in them runs.
+    """
+    found = []
+    for entry in sorted(os.listdir(directory)):
+        if entry.endswith(".py") and not entry.startswith("_"):
+            script = _read(os.path.join(directory, entry))
+            if script is not None:
+                found.append(script)
+    return found
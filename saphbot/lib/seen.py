@@ -0,0 +1,99 @@
+"""
+Titles handled recently, checked and recorded in bulk.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["SeenCache"]
+
+import logging
+import os
+from threading import Lock
+from typing import Callable, Iterable, Iterator, Optional
+
+import diskcache
+from pywikibot import Page
+
+from lib.misc import chunked
+
+logger = logging.getLogger("saphbot.lib.seen")
+
+DIRECTORY = "./.saphbot_cache/seen"
+
+
+class SeenCache:
+    """
+    Titles a bot handled within the last `ttl` seconds, across runs.
+
+    Lookups and writes go to SQLite `buffer` titles at a time, each batch
+    in one transaction, instead of one locked statement per title from
+    every worker thread. Titles added since the last batch are only
+    committed by flush() or close(), so a crash forgets them and they're
+    handled again next time.
+    """
+
+    def __init__(
+        self, name: str, ttl: float, directory: str = DIRECTORY, buffer: int = 500
+    ):
+        self.path = os.path.join(directory, name)
+        self.ttl = ttl
+        self.buffer = buffer
+        self._cache = diskcache.Cache(self.path)
+        self._pending: list[str] = []
+        self._lock = Lock()
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._cache
+
+    def filter(
+        self, pages: Iterable[Page], skipped: Optional[Callable[[Page], None]] = None
+    ) -> Iterator[Page]:
+        """
+        Yield the pages not seen recently, calling `skipped` for every
+        other one. Only titles are compared, so nothing is fetched to
+        decide.
+        """
+        for batch in chunked(pages, self.buffer):
+            with self._cache.transact():
+                seen = [page.title() in self._cache for page in batch]
+            for page, hit in zip(batch, seen):
+                if not hit:
+                    yield page
+                elif skipped is not None:
+                    skipped(page)
+
+    def add(self, title: str):
+        with self._lock:
+            self._pending.append(title)
+            if len(self._pending) >= self.buffer:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self._cache.transact():
+            for title in self._pending:
+                self._cache.set(title, True, expire=self.ttl)
+        logger.debug(f"recorded {len(self._pending)} titles as seen")
+        self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        self._cache.close()
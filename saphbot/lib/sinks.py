@@ -0,0 +1,170 @@
+"""
+Buffered, thread-safe outputs for the findings of report bots.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["CsvSink", "Finding", "JsonlSink", "Sink", "WikitableSink", "open_sink"]
+
+import csv
+import json
+import logging
+import os
+import sys
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, TextIO
+
+logger = logging.getLogger("saphbot.lib.sinks")
+
+Finding = dict[str, Any]
+
+
+class Sink(ABC):
+    """
+    Collects findings from any number of threads and writes them out
+    `buffer` at a time, so that workers don't queue up on the file.
+    Subclasses implement _write() for a list of findings; close() writes
+    whatever is left.
+
+    With `append`, findings are added to an existing file, as when a run
+    is resumed, rather than replacing it.
+    """
+
+    def __init__(self, path: str, buffer: int = 1000, append: bool = False):
+        self.path = path
+        self.buffer = buffer
+        self.written = 0
+        self._pending: list[Finding] = []
+        self._lock = Lock()
+        if path == "-":
+            self._file: TextIO = sys.stdout
+            self._fresh = True
+        else:
+            # Whether the output starts out empty and needs a header.
+            self._fresh = not (
+                append and os.path.exists(path) and os.path.getsize(path)
+            )
+            self._file = open(
+                path, "a" if append else "w", encoding="utf-8", newline=""
+            )
+
+    def write(self, finding: Finding):
+        with self._lock:
+            self._pending.append(finding)
+            if len(self._pending) >= self.buffer:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._write(self._pending)
+            self._file.flush()
+            self.written += len(self._pending)
+            self._pending = []
+
+    @abstractmethod
+    def _write(self, findings: list[Finding]):
+        pass
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._finish()
+            self._file.flush()
+            if self._file is not sys.stdout:
+                self._file.close()
+        logger.info(f"wrote {self.written} findings to {self.path}")
+
+
+class JsonlSink(Sink):
+    """
+    One JSON object per line.
+    """
+
+    def _write(self, findings: list[Finding]):
+        self._file.write(
+            "".join(json.dumps(f, ensure_ascii=False) + "\n" for f in findings)
+        )
+
+
+class CsvSink(Sink):
+    """
+    CSV with a header taken from the first finding; keys that later
+    findings add are dropped.
+    """
+
+    _writer = None
+
+    def _write(self, findings: list[Finding]):
+        if self._writer is None:
+            self._writer = csv.DictWriter(
+                self._file, fieldnames=list(findings[0]), extrasaction="ignore"
+            )
+            if self._fresh:
+                self._writer.writeheader()
+        self._writer.writerows(findings)
+
+
+class WikitableSink(Sink):
+    """
+    A sortable wikitable, ready to paste onto a wiki page. The `title`
+    column is linked.
+    """
+
+    _columns = None
+
+    def _cell(self, key: str, value: Any) -> str:
+        if value is None:
+            return ""
+        text = str(value)
+        if key == "title":
+            # A leading colon keeps category and file titles from
+            # turning into categorisation or an embedded image.
+            return f"[[:{text}]]"
+        return text.replace("|", "{{!}}")
+
+    def _write(self, findings: list[Finding]):
+        lines = []
+        if self._columns is None:
+            self._columns = list(findings[0])
+            lines.append('{| class="wikitable sortable"')
+            lines.append("! " + " !! ".join(self._columns))
+        for finding in findings:
+            lines.append("|-")
+            lines.append(
+                "| " + " || ".join(self._cell(k, finding.get(k)) for k in self._columns)
+            )
+        self._file.write("\n".join(lines) + "\n")
+
+    def _finish(self):
+        if self._columns is not None:
+            self._file.write("|}\n")
+
+
+# By file extension; anything else, and "-" for stdout, is JSONL.
+SINKS: dict[str, type[Sink]] = {
+    ".csv": CsvSink,
+    ".wiki": WikitableSink,
+    ".wikitext": WikitableSink,
+}
+
+
+def open_sink(path: str, append: bool = False) -> Sink:
+    extension = os.path.splitext(path)[1].lower()
+    return SINKS.get(extension, JsonlSink)(path, append=append)
@@ -0,0 +1,177 @@
+"""
+Users' last contributions, looked up many users at a time and cached on
+disk.
+
+Copyright (c) 2026 Choi Madeleine
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ["UserActivity"]
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Iterable, Optional, Union
+
+import diskcache
+from pywikibot import Site, Timestamp
+from pywikibot.site import BaseSite
+
+from lib.misc import chunked
+
+logger = logging.getLogger("saphbot.lib.users")
+
+DIRECTORY = "./.saphbot_cache/users"
+
+_MISSING = object()
+
+
+class UserActivity:
+    """
+    When each user last contributed, like User.last_edit, but found for
+    up to the site's limit of users per usercontribs query, `workers`
+    queries at a time.
+
+    A query asks for everything since `cutoff`, so users who were active
+    since then come back with their latest contribution. The query isn't
+    continued: a few prolific users can fill a response by themselves, so
+    those who didn't appear in a truncated one are asked about one at a
+    time, for their latest contribution only. The users left over are then
+    looked up the same way before the cutoff, and those with no
+    contributions at all get None.
+
+    Answers are kept on disk for `ttl` seconds, so a user who starts
+    editing again can be reported as inactive until then.
+    """
+
+    def __init__(
+        self,
+        cutoff: Timestamp,
+        site: Optional[BaseSite] = None,
+        workers: int = 4,
+        ttl: float = 24 * 60 * 60,
+        directory: str = DIRECTORY,
+    ):
+        self.cutoff = cutoff
+        self.site = site or Site()
+        self.workers = workers
+        self.ttl = ttl
+        self._cache = diskcache.Cache(directory)
+        self._known: dict[str, Optional[Timestamp]] = {}
+        self._lock = Lock()
+
+    def _query(
+        self, users: list[str], before: bool, limit: Union[int, str] = "max"
+    ) -> tuple[dict[str, Timestamp], bool]:
+        """
+        One request for up to `limit` contributions of `users` on one side
+        of the cutoff. Returns the latest one seen per user, and whether
+        the response held all of them.
+        """
+        bound = "ucstart" if before else "ucend"
+        data = self.site.simple_request(
+            action="query",
+            list="usercontribs",
+            ucuser=users,
+            ucprop="timestamp",
+            uclimit=limit,
+            **{bound: self.cutoff.isoformat()},
+        ).submit()
+        latest: dict[str, Timestamp] = {}
+        for contribution in data["query"]["usercontribs"]:
+            user = contribution["user"]
+            timestamp = Timestamp.fromISOformat(contribution["timestamp"])
+            if user not in latest or timestamp > latest[user]:
+                latest[user] = timestamp
+        return latest, "continue" not in data
+
+    def _resolve(
+        self, executor: ThreadPoolExecutor, users: list[str], before: bool
+    ) -> tuple[dict[str, Timestamp], list[str]]:
+        """
+        The latest contribution of each of `users` on one side of the
+        cutoff, and the users who have none there.
+        """
+        found: dict[str, Timestamp] = {}
+        absent: list[str] = []
+        unresolved: list[str] = []
+        groups = list(chunked(users, self.site.maxlimit))
+        results = executor.map(partial(self._query, before=before), groups)
+        for group, (latest, complete) in zip(groups, results):
+            found.update(latest)
+            rest = [user for user in group if user not in latest]
+            (absent if complete else unresolved).extend(rest)
+
+        # Querying these in batches again could take a round per user, if
+        # each response is filled by whoever is most active among them.
+        singles = executor.map(
+            partial(self._query, before=before, limit=1),
+            ([user] for user in unresolved),
+        )
+        for user, (latest, _) in zip(unresolved, singles):
+            if user in latest:
+                found[user] = latest[user]
+            else:
+                absent.append(user)
+        logger.debug(
+            f"resolved {len(found) + len(absent)} users, "
+            f"{len(unresolved)} of them one at a time"
+        )
+        return found, absent
+
+    def _lookup(self, user: str) -> object:
+        with self._lock:
+            if user in self._known:
+                return self._known[user]
+        return self._cache.get(user, _MISSING)
+
+    def prefetch(self, users: Iterable[str]):
+        """
+        Look up every user not already known.
+        """
+        unknown = []
+        for user in dict.fromkeys(users):
+            known = self._lookup(user)
+            if known is _MISSING:
+                unknown.append(user)
+            else:
+                with self._lock:
+                    self._known[user] = known  # type: ignore
+        if not unknown:
+            return
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="users") as executor:
+            active, inactive = self._resolve(executor, unknown, before=False)
+            dormant, never = self._resolve(executor, inactive, before=True)
+        resolved: dict[str, Optional[Timestamp]] = {**active, **dormant}
+        resolved.update(dict.fromkeys(never))
+        with self._lock:
+            self._known.update(resolved)
+        for user, timestamp in resolved.items():
+            self._cache.set(user, timestamp, expire=self.ttl)
+
+    def last_active(self, user: str) -> Optional[Timestamp]:
+        """
+        When `user` last contributed, or None if they never have.
+        """
+        known = self._lookup(user)
+        if known is _MISSING:
+            self.prefetch([user])
+            known = self._known[user]
+        return known  # type: ignore
+
+    def close(self):
+        self._cache.close()
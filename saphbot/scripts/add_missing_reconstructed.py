@@ -19,21 +19,30 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import re
+
 from pywikibot import Site
-from pywikibot.page import Category, Page
-from pywikibot.pagegenerators import CategorizedPageGenerator, PreloadingGenerator
+from pywikibot.page import Category
 
 from core import SaphBot
+from lib.category import CategoryTree
 
-site = Site()
-cat = Category(site, "Category:Entries missing Template:reconstructed by language")
+# The template under either of the names it goes by.
+template = re.compile(r"\{\{\s*[Rr]econstruct(?:ion|ed)\s*[|}]")
 
 
 class AddMissingReconstructedBot(SaphBot):
-    gen = CategorizedPageGenerator(cat, recurse=True, namespaces=118)
-    gen = PreloadingGenerator(gen, quiet=True)
+    namespaces = [118]
     summary = "add {{[[Template:reconstructed|reconstructed]]}}"
 
-    def treat(self, page: Page) -> Page:
-        page.text = "{{reconstruction}}\n" + page.text
-        return page
+    def generator(self) -> CategoryTree:
+        cat = Category(
+            Site(), "Category:Entries missing Template:reconstructed by language"
+        )
+        return CategoryTree(cat, namespaces=self.namespaces)
+
+    def transform(self, title: str, text: str) -> str:
+        # The category can lag behind edits, so a page may already have it.
+        if template.search(text):
+            return text
+        return "{{reconstruction}}\n" + text
@@ -1,4 +1,4 @@
-#!/usr/bin/env python3
+#!/usr/bin/env python3 saphbot
 
 """
 Find pages using AI images.
@@ -20,58 +20,93 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import re
-import signal
-import sys
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Iterator
 
+import diskcache
 from pywikibot import Category, Page, Site
-from pywikibot.exceptions import InvalidTitleError
-from pywikibot.pagegenerators import CategorizedPageGenerator, PreloadingGenerator
-from tqdm import tqdm
+from pywikibot.data.api import PropertyGenerator
+from pywikibot.pagegenerators import CategorizedPageGenerator
+from pywikibot.site import BaseSite
 
-signal.signal(signal.SIGINT, lambda *_: sys.exit(130))
+from core import ReportBot
+from lib.misc import chunked
+from lib.sinks import Finding
 
 image_link = re.compile(r"\[\[(?:image|file):([^|\]]+)", flags=re.I)
 
-site = Site()
-commons = Site("commons:commons")
-category = Category(site, "English lemmas")
-gen = CategorizedPageGenerator(category, content=True)
+TTL = 7 * 24 * 60 * 60
 
 
-@lru_cache(maxsize=100_000)
-def is_ai_image(page: Page) -> bool:
-    for category in page.categories():
-        # dumb heuristic: traversing all the parents to figure out if it's in a
-        # subcat of `CAT:AI-generated images` would be super expensive, so just
-        # check if "AI-generated" is in the category name
-        if "AI-generated" in category.title():
-            return True
+@cache
+def verdict_cache() -> diskcache.Cache:
+    # Verdicts per file, kept across runs; a file's categories rarely change.
+    return diskcache.Cache("./.saphbot_cache/ai_images")
 
-    return False
 
+def file_title(link: str) -> str:
+    # What MediaWiki would normalise the link to, so that titles match
+    # the ones the API sends back.
+    name = " ".join(link.replace("_", " ").split())
+    return "File:" + name[:1].upper() + name[1:]
 
-def treat(page: Page):
-    links = image_link.findall(page.text)
-
-    if len(links) == 0:
-        return
-
-    for link in links:
-        image = Page(commons, title=link)
-        try:
-            if is_ai_image(image):
-                tqdm.write(
-                    f"\033[1;31mAI:\033[0m [[{page.title()}]] [[{image.title()}]]"
-                )
-                break
-        except InvalidTitleError as e:
-            print(e)
-            continue
 
+def commons() -> BaseSite:
+    return Site("commons:commons")
 
-preload = PreloadingGenerator(gen, 500, quiet=True)
 
-
-for page in tqdm(preload, unit="ppg"):
-    treat(page)
+def fetch_verdicts(titles: list[str]) -> dict[str, bool]:
+    verdicts = dict.fromkeys(titles, False)
+    query = PropertyGenerator(
+        "categories", site=commons(), parameters={"titles": titles, "cllimit": "max"}
+    )
+    for data in query:
+        # dumb heuristic: traversing all the parents to figure out if it's in a
+        # subcat of `CAT:AI-generated images` would be super expensive, so just
+        # check if "AI-generated" is in the category name
+        if data["title"] in verdicts and any(
+            "AI-generated" in category["title"]
+            for category in data.get("categories", [])
+        ):
+            verdicts[data["title"]] = True
+    return verdicts
+
+
+def verdicts_for(titles: set[str]) -> dict[str, bool]:
+    """
+    Whether each file is AI-generated, from the cache where possible and
+    otherwise from Commons, as many titles per query as it allows.
+    """
+    verdicts = {title: verdict_cache().get(title) for title in titles}
+    missing = [title for title, verdict in verdicts.items() if verdict is None]
+    with ThreadPoolExecutor(4) as executor:
+        for fetched in executor.map(
+            fetch_verdicts, chunked(missing, commons().maxlimit)
+        ):
+            for title, verdict in fetched.items():
+                verdict_cache().set(title, verdict, expire=TTL)
+            verdicts.update(fetched)
+    return verdicts
+
+
+def files(page: Page) -> list[str]:
+    return [file_title(link) for link in image_link.findall(page.text)]
+
+
+class AIImagesBot(ReportBot):
+    prefilter = image_link
+
+    def generator(self) -> Iterator[Page]:
+        return CategorizedPageGenerator(Category(Site(), "English lemmas"))
+
+    def prepare(self, pages: list[Page]):
+        # Looked up a batch at a time into the disk cache, where scan()
+        # finds them; nothing is held in memory past the batch.
+        verdicts_for({title for page in pages for title in files(page)})
+
+    def scan(self, page: Page) -> Iterator[Finding]:
+        for title in files(page):
+            if verdict_cache().get(title):
+                yield {"file": title}
+                break
@@ -20,60 +20,72 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import logging
 from datetime import timedelta
-from typing import Optional
+from functools import cache, cached_property
+from typing import Iterable, Optional
 
-import diskcache
 import mwparserfromhell
 from core import SaphBot
-from pywikibot import Site
+from pywikibot import Site, Timestamp
 from pywikibot.page import BasePage, User
-from pywikibot.pagegenerators import PreloadingGenerator
 
-ignore = (
-    open("saphbot/lists/babel_cat_ignore.txt", "r", encoding="utf-8")
-    .read()
-    .splitlines()
-)
+from lib.users import UserActivity
 
-site = Site()
-tl_page = BasePage(site, "Template:Babel")
 
-cache = diskcache.Cache("./.saphbot_cache")
-
-logger = logging.getLogger("saphbot.scripts.disable_babel_cat")
+@cache
+def ignored() -> set[str]:
+    with open("saphbot/lists/babel_cat_ignore.txt", "r", encoding="utf-8") as f:
+        return set(f.read().splitlines())
 
 
 class DisableBabelCatBot(SaphBot):
-    gen = tl_page.getReferences(
-        only_template_inclusion=True, namespaces=2, content=True
-    )
-    gen = PreloadingGenerator(gen, quiet=True)
+    namespaces = [2]
     summary = (
         "mark users whose last contribution was more than 2 "
         "years ago as inactive in Babel"
     )
+    # Pages handled in the last day are left alone until the next.
+    seen_ttl = 24 * 60 * 60
+
+    def generator(self) -> Iterable[User]:
+        tl_page = BasePage(Site(), "Template:Babel")
+        return tl_page.getReferences(
+            only_template_inclusion=True, namespaces=self.namespaces
+        )
 
-    _server_time = Site().server_time()
+    @cached_property
+    def _server_time(self) -> Timestamp:
+        return Site().server_time()
 
-    def __treat(self, page: User) -> Optional[User]:
+    @cached_property
+    def _activity(self) -> UserActivity:
+        return UserActivity(self._server_time - timedelta(days=730))
+
+    @staticmethod
+    def _candidate(page: User) -> bool:
         title = page.title()
         text = page.text
+        return (
+            "Babel" in text
+            and "babel" in text
+            and "/" not in title
+            and title not in ignored()
+        )
+
+    def prepare(self, pages: list[User]):
+        # Whose last contributions treat() will ask for, fetched together.
+        self._activity.prefetch(
+            page.username for page in pages if self._candidate(page)
+        )
 
-        if (
-            "Babel" not in text
-            or "babel" not in text
-            or "/" in title
-            or not page.botMayEdit()
-            or title in ignore
-        ):
+    def treat(self, page: User) -> Optional[User]:  # type: ignore
+        if not self._candidate(page) or not page.botMayEdit():
             return None
 
         code = mwparserfromhell.parse(page.text)
 
-        last_edit = page.last_edit
-        if last_edit is None:
+        last_active = self._activity.last_active(page.username)
+        if last_active is None:
             return None
 
         templates = [
@@ -96,19 +108,10 @@ class DisableBabelCatBot(SaphBot):
             if already_tagged:
                 return None
 
-            delta = self._server_time - last_edit[2]
+            delta = self._server_time - last_active
             if delta >= timedelta(days=730):
                 template.add("inactive", "1")
 
         page.text = str(code)
 
         return page
-
-    def treat(self, page: User) -> Optional[User]:  # type: ignore
-        title = page.title()
-        if title in cache:
-            logger.debug("cache hit")
-            return None
-        result = self.__treat(page)
-        cache.add(title, True, expire=60 * 60 * 24)
-        return result
@@ -22,35 +22,32 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import re
 import signal
 import sys
-from typing import Optional
-from pywikibot import Site
+from typing import Iterator, Optional
 from pywikibot import Page
-from pywikibot.pagegenerators import PreloadingGenerator, TextIOPageGenerator
+from pywikibot.pagegenerators import TextIOPageGenerator
 
 from core import SaphBot
 
 signal.signal(signal.SIGINT, lambda *_: sys.exit(130))
 
-site = Site()
 repl = re.compile("{{langcat\\|{{pagename}}}}", flags=re.I)
 
 
 class LangcatRedundantPagenameBot(SaphBot):
-    gen = TextIOPageGenerator("lists/dumped/langcat_redundant_pagename.txt")
-    gen = PreloadingGenerator(gen, quiet=True)
+    prefilter = re.compile(r"\{\{langcat\|", flags=re.I)
     summary = (
         "remove redundant pagenames from {{[[Template:langcat|langcat]]}} invocations"
     )
 
-    def treat(self, page: Page) -> Optional[Page]:
-        text = page.text
+    def generator(self) -> Iterator[Page]:
+        return TextIOPageGenerator("lists/dumped/langcat_redundant_pagename.txt")
 
+    def transform(self, title: str, text: str) -> Optional[str]:
         if repl.search(text):
             text = repl.sub("{{langcat}}", text)
-        elif "{{langcat|" + page.title() + "}}" in text:
-            text = text.replace("{{langcat|" + page.title() + "}}", "{{langcat}}")
+        elif "{{langcat|" + title + "}}" in text:
+            text = text.replace("{{langcat|" + title + "}}", "{{langcat}}")
         else:
             return None
 
-        page.text = text
-        return page
+        return text
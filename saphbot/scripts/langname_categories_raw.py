@@ -23,11 +23,11 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import re
 import mwparserfromhell
 from pywikibot import Site
-from pywikibot.page import Category, Page
-from pywikibot.pagegenerators import CategorizedPageGenerator, PreloadingGenerator
+from pywikibot.page import Category
 from typing import Optional
 
 from core import SaphBot
+from lib.category import CategoryTree
 from lib.data_utils import Languages
 from lib.misc import merge_templates
 
@@ -38,23 +38,20 @@ def parse_cat(txt: str) -> str:
     to {{cln}} with a language code.
     """
 
-    txt = txt.replace("_", " ")
-    parts = txt.split()
+    return parse_cats([txt])[0]
 
-    for i in range(len(parts), 0, -1):
-        lang = " ".join(parts[:i])
-        code = languages.get_canonical_names().get(lang)
-        if code:
-            rest = " ".join(parts[i:])
-            return f"{{{{cln|{code}|{rest}}}}}"
 
-    return txt
+def parse_cats(titles: list[str]) -> list[str]:
+    """
+    parse_cat() for all the category links on a page at once.
+    """
 
+    titles = [title.replace("_", " ") for title in titles]
+    return [
+        title if split is None else f"{{{{cln|{split[0]}|{split[1]}}}}}"
+        for title, split in zip(titles, languages.split_names(titles))
+    ]
 
-site = Site()
-cat = Category(
-    site, "Category:Entries with language name categories using raw markup by language"
-)
 
 is_category = re.compile(r"\[\[cat(?:egory):([^\]]+)\]\]", flags=re.I)
 
@@ -62,14 +59,21 @@ languages = Languages()
 
 
 class LangnameCategoriesRawBot(SaphBot):
-    gen = CategorizedPageGenerator(cat, recurse=True, namespaces=[0, 118])
-    gen = PreloadingGenerator(gen, quiet=True)
+    namespaces = [0, 118]
+    prefilter = re.compile(r"\[\[category:", flags=re.I)
     summary = (
         "replace raw langname category markup with {{[[Template:catlangname|cln]]}}"
     )
 
-    def treat(self, page: Page) -> Optional[Page]:
-        code = mwparserfromhell.parse(page.text)
+    def generator(self) -> CategoryTree:
+        cat = Category(
+            Site(),
+            "Category:Entries with language name categories using raw markup by language",
+        )
+        return CategoryTree(cat, namespaces=self.namespaces)
+
+    def transform(self, title: str, text: str) -> Optional[str]:
+        code = mwparserfromhell.parse(text)
 
         # first pass: convert cat links to cln
 
@@ -77,10 +81,9 @@ class LangnameCategoriesRawBot(SaphBot):
             matches=lambda link: is_category.search(str(link)) is not None
         )
 
-        for link in links:
-            title = str(link.title)[9:]
-            template = parse_cat(title)
-            if template != title:
+        targets = [str(link.title)[9:] for link in links]
+        for link, target, template in zip(links, targets, parse_cats(targets)):
+            if template != target:
                 code.replace(link, template)
 
         # second pass: merge cln templates
@@ -88,5 +91,4 @@ class LangnameCategoriesRawBot(SaphBot):
         templates = code.filter_templates(matches=lambda tl: tl.name == "cln")
         merge_templates(code, templates)
 
-        page.text = str(code)
-        return page
+        return str(code)
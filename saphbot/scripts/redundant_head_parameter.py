@@ -24,36 +24,34 @@ import signal
 import sys
 import mwparserfromhell
 import pywikibot
-from pywikibot.page import Page
-from pywikibot.pagegenerators import CategorizedPageGenerator, PreloadingGenerator
 from typing import Optional
 
 from core import SaphBot
+from lib.category import CategoryTree
 
 signal.signal(signal.SIGINT, lambda *_: sys.exit(130))
 
-site = pywikibot.Site()
-cat = pywikibot.Category(
-    site, "Category:Terms with redundant head parameter by language"
-)
-
 # ignore titles which contain apostrophes or dashes
 # FIXME: hack; should properly update such pages with `|nolink=1`
 ignore = re.compile("['\\-]")
 
 
 class RedundantHeadParameterBot(SaphBot):
-    gen = CategorizedPageGenerator(cat, recurse=True, namespaces=[0, 100, 118])
-    gen = PreloadingGenerator(gen)
+    namespaces = [0, 100, 118]
+    prefilter = re.compile(r"\|\s*head\s*=")
     summary = "remove redundant |head= parameters from headword templates"
 
-    def treat(self, page: Page) -> Optional[Page]:
-        title = page.title()
+    def generator(self) -> CategoryTree:
+        cat = pywikibot.Category(
+            pywikibot.Site(), "Category:Terms with redundant head parameter by language"
+        )
+        return CategoryTree(cat, namespaces=self.namespaces)
 
+    def transform(self, title: str, text: str) -> Optional[str]:
         if ignore.search(title):
             return None
 
-        code = mwparserfromhell.parse(page.text)
+        code = mwparserfromhell.parse(text)
         templates = code.filter_templates()
 
         words = title.split(" ")
@@ -70,5 +68,4 @@ class RedundantHeadParameterBot(SaphBot):
                 if is_multiword and head.value == linked_title or head.value == title:
                     template.remove(head)
 
-        page.text = str(code)
-        return page
+        return str(code)
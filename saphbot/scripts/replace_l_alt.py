@@ -20,30 +20,19 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 import mwparserfromhell
-from lxml import etree  # type: ignore
 from pywikibot import Page, Site
-from pywikibot.pagegenerators import PreloadingGenerator
 from typing import Generator, Optional
 
 from core import SaphBot
-
-site = Site()
+from lib.dump import iter_pages as iter_dump
 
 
 def iter_pages() -> Generator[Page, None, None]:
-    iterator = etree.iterparse("dumps/latest.xml", events=("end",), tag=("{*}page"))
-    for _, elem in iterator:
-        text = elem.find("{*}revision/{*}text").text
-        namespace = elem.find("{*}ns").text
-
-        if namespace not in ["0", "118"]:
-            continue
-
+    site = Site()
+    for title, _, _, _, text in iter_dump("dumps/latest.xml", namespaces=[0, 118]):
         if "Alternative forms" not in text:
             continue
 
-        title = elem.find("{*}title").text
-
         code = mwparserfromhell.parse(text)
         sections = code.get_sections()
 
@@ -67,11 +56,17 @@ def iter_pages() -> Generator[Page, None, None]:
 
 
 class ReplaceLAltBot(SaphBot):
-    gen = PreloadingGenerator(iter_pages())
+    namespaces = [0, 118]
+    prefilter = {"Alternative forms", "{{l"}
+    # The generator is itself a dump scan for what transform() looks for.
+    dump_all = True
     summary = "replace {{[[Template:l|l]]}} with {{[[Template:alt|alt]]}} in alternative forms sections"
 
-    def treat(self, page: Page) -> Optional[Page]:
-        code = mwparserfromhell.parse(page.text)
+    def generator(self) -> Generator[Page, None, None]:
+        return iter_pages()
+
+    def transform(self, title: str, text: str) -> Optional[str]:
+        code = mwparserfromhell.parse(text)
         sections = code.get_sections()
 
         for section in sections:
@@ -91,9 +86,8 @@ class ReplaceLAltBot(SaphBot):
             for template in templates:
                 template.name = "alt"
 
-        text = str(code)
-        if text != page.text:
-            page.text = text
-            return page
+        new = str(code)
+        if new != text:
+            return new
 
         return None
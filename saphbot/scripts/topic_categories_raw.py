@@ -22,28 +22,31 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import re
 import mwparserfromhell
 from pywikibot import Site
-from pywikibot.page import Category, Page
-from pywikibot.pagegenerators import CategorizedPageGenerator, PreloadingGenerator
+from pywikibot.page import Category
 from typing import Optional
 
 from core import SaphBot
+from lib.category import CategoryTree
 from lib.misc import merge_templates
 
-site = Site()
-cat = Category(
-    site, "Category:Entries with topic categories using raw markup by language"
-)
 
 is_category = re.compile(r"\[\[cat(?:egory):([^\]]+)\]\]", flags=re.I)
 
 
 class TopicCategoriesRawBot(SaphBot):
-    gen = CategorizedPageGenerator(cat, recurse=True, namespaces=[0, 118])
-    gen = PreloadingGenerator(gen, quiet=True)
+    namespaces = [0, 118]
+    prefilter = re.compile(r"\[\[category:[^:\]]*:", flags=re.I)
     summary = "replace raw topic category markup with {{[[Template:topics|C]]}}"
 
-    def treat(self, page: Page) -> Optional[Page]:
-        code = mwparserfromhell.parse(page.text)
+    def generator(self) -> CategoryTree:
+        cat = Category(
+            Site(),
+            "Category:Entries with topic categories using raw markup by language",
+        )
+        return CategoryTree(cat, namespaces=self.namespaces)
+
+    def transform(self, title: str, text: str) -> Optional[str]:
+        code = mwparserfromhell.parse(text)
 
         # first pass: convert cat links to templates
 
@@ -52,13 +55,13 @@ class TopicCategoriesRawBot(SaphBot):
         )
 
         for link in links:
-            title = str(link.title)
-            parts = title.split(":")
+            target = str(link.title)
+            parts = target.split(":")
 
             if len(parts) != 3:
                 continue
 
-            lang, topic = title.split(":")[1:]
+            lang, topic = target.split(":")[1:]
             code.replace(link, f"{{{{C|{lang}|{topic}}}}}")
 
         # second pass: merge c/C/topics templates
@@ -69,5 +72,4 @@ class TopicCategoriesRawBot(SaphBot):
 
         merge_templates(code, templates)
 
-        page.text = str(code)
-        return page
+        return str(code)
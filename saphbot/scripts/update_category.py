@@ -30,6 +30,7 @@ from pywikibot import pagegenerators
 from pywikibot.page import BasePage
 
 from lib.misc import diff
+from lib.preload import Preloader
 
 # pywikibot has an obnoxiously long traceback for sigint, just handle it here
 signal.signal(signal.SIGINT, lambda *_: sys.exit(130))
@@ -90,7 +91,7 @@ else:
     repl = lambda _: f"[[{cat_renamed}]]"
 
 
-for page in pagegenerators.PreloadingGenerator(gen, 10):
+for page in Preloader(site)(gen):
     text = update.sub(repl, page.text)
 
     if "review" in options: